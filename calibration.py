@@ -0,0 +1,81 @@
+import argparse
+import json
+import os
+import numpy as np
+from genesis_encoding import DEFAULT_ENCODING
+from ledger import LEDGER_FILE, read_records
+from report_engine import size_sort_key, variant_key
+
+# Value the mock client reports about itself next to each harness metric
+CLIENT_FIELDS = {
+    'speed': ('client_startup_ms', 'ms'),
+    'memory': ('client_peak_rss_mb', 'MB'),
+}
+
+
+def harness_errors(ledger_path):
+    # Harness value minus what the mock itself saw, per metric, size and phase
+    errors = {}
+    for record in read_records(ledger_path):
+        if record.get('metric') not in CLIENT_FIELDS or record['value'] < 0:
+            continue
+        field, _ = CLIENT_FIELDS[record['metric']]
+        client_value = (record.get('sampler') or {}).get(field)
+        if client_value is None:
+            continue
+        key = (record['metric'], variant_key(record['size'], record.get('encoding') or DEFAULT_ENCODING), record['phase'])
+        errors.setdefault(key, []).append(record['value'] - client_value)
+    return errors
+
+
+def summarize(errors):
+    results = {}
+    for (metric, size, phase), values in sorted(errors.items(), key=lambda item: (item[0][0], size_sort_key(item[0][1]),
+                                                                                   item[0][2])):
+        values = np.array(values, dtype=float)
+        results.setdefault(metric, {}).setdefault(size, {})[phase] = {
+            'unit': CLIENT_FIELDS[metric][1],
+            'mean': float(np.mean(values)),
+            'p50': float(np.percentile(values, 50)),
+            'min': float(np.min(values)),
+            'max': float(np.max(values)),
+            'std': float(np.std(values)),
+            'count': int(len(values)),
+        }
+    return results
+
+
+def print_calibration(results):
+    for metric, sizes in results.items():
+        field, unit = CLIENT_FIELDS[metric]
+        print(f"{metric}: harness value - {field}")
+        for size, phases in sizes.items():
+            for phase, stats in phases.items():
+                print(f"  {size} {phase}: p50 {stats['p50']:+.0f}{unit}, mean {stats['mean']:+.1f}{unit}, "
+                      f"range [{stats['min']:+.0f}, {stats['max']:+.0f}]{unit}, n={stats['count']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Harness calibration against the mock client')
+    parser.add_argument('--resultsPath', type=str, help='Results path of a sweep that included the mock client',
+                        required=True)
+    args = parser.parse_args()
+
+    ledger_path = os.path.join(args.resultsPath, LEDGER_FILE)
+    if not os.path.exists(ledger_path):
+        print(f"Ledger not found: {ledger_path}")
+        return
+    results = summarize(harness_errors(ledger_path))
+    if not results:
+        print("No mock client measurements with self-reported values found")
+        return
+    print_calibration(results)
+    reports_path = os.path.join(args.resultsPath, 'reports')
+    os.makedirs(reports_path, exist_ok=True)
+    with open(os.path.join(reports_path, 'calibration.json'), 'w') as file:
+        json.dump(results, file, indent=4)
+    print(f"Calibration saved to {os.path.join(reports_path, 'calibration.json')}")
+
+
+if __name__ == '__main__':
+    main()
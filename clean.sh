@@ -3,11 +3,16 @@ rm -rvf results
 rm nohup.out
 rm output.log
 
-docker stop gas-execution-client
-docker stop gas-execution-client-sync
-
-docker rm gas-execution-client
-docker rm gas-execution-client-sync
+# Lane containers are named gas-execution-client[-sync][-laneN]
+containers=$(docker ps -aq --filter "name=^gas-execution-client")
+if [ -n "$containers" ]; then
+  docker stop $containers
+  docker rm $containers
+fi
+networks=$(docker network ls -q --filter "name=^gas-network")
+if [ -n "$networks" ]; then
+  docker network rm $networks
+fi
 
 pkill runMemory.sh
 pkill runSpeed.sh
\ No newline at end of file
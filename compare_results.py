@@ -0,0 +1,179 @@
+import argparse
+import json
+import math
+import os
+import sys
+import numpy as np
+from report_engine import METRICS, base_metrics, load_table, select_rows, size_sort_key
+
+
+def mann_whitney_u(baseline, candidate):
+    # Two-sided Mann-Whitney U test, normal approximation with tie and continuity correction
+    n1 = len(baseline)
+    n2 = len(candidate)
+    combined = np.concatenate((baseline, candidate))
+    unique_values, inverse, counts = np.unique(combined, return_inverse=True, return_counts=True)
+    # Average rank of each distinct value, ties share the mean of their positions
+    upper_ranks = np.cumsum(counts)
+    average_ranks = upper_ranks - (counts - 1) / 2
+    ranks = average_ranks[inverse]
+    u = np.sum(ranks[:n1]) - n1 * (n1 + 1) / 2
+    n = n1 + n2
+    tie_term = np.sum(counts ** 3 - counts) / (n * (n - 1))
+    sigma = math.sqrt(n1 * n2 / 12 * ((n + 1) - tie_term))
+    if sigma == 0:
+        return float(u), 1.0
+    mean = n1 * n2 / 2
+    z = (abs(u - mean) - 0.5) / sigma
+    p_value = math.erfc(max(z, 0) / math.sqrt(2))
+    return float(u), float(min(p_value, 1.0))
+
+
+def bootstrap_median_change(baseline, candidate, iterations, confidence, rng):
+    baseline_medians = np.median(rng.choice(baseline, (iterations, len(baseline))), axis=1)
+    candidate_medians = np.median(rng.choice(candidate, (iterations, len(candidate))), axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        changes = (candidate_medians - baseline_medians) / baseline_medians
+    changes = changes[np.isfinite(changes)]
+    if len(changes) == 0:
+        return None, None
+    tail = (1 - confidence) / 2 * 100
+    lower, upper = np.percentile(changes, [tail, 100 - tail])
+    return float(lower), float(upper)
+
+
+def group_key(client, by_base_client):
+    return client.split("_")[0] if by_base_client else client
+
+
+def compare_groups(baseline_table, candidate_table, metrics, args, by_base_client):
+    rng = np.random.default_rng(args.seed)
+    comparisons = []
+    for metric in metrics:
+        baseline_rows = select_rows(baseline_table, baseline_table['metric'] == metric)
+        candidate_rows = select_rows(candidate_table, candidate_table['metric'] == metric)
+        baseline_clients = np.array([group_key(c, by_base_client) for c in baseline_rows['client']], dtype=str)
+        candidate_clients = np.array([group_key(c, by_base_client) for c in candidate_rows['client']], dtype=str)
+        keys = set(zip(baseline_clients, baseline_rows['size'], baseline_rows['encoding'], baseline_rows['phase']))
+        keys &= set(zip(candidate_clients, candidate_rows['size'], candidate_rows['encoding'], candidate_rows['phase']))
+        for client, size, encoding, phase in sorted(keys, key=lambda key: (key[0], size_sort_key(key[1]), key[2], key[3])):
+            baseline_all = baseline_rows['value'][(baseline_clients == client) & (baseline_rows['size'] == size)
+                                                  & (baseline_rows['encoding'] == encoding)
+                                                  & (baseline_rows['phase'] == phase)]
+            candidate_all = candidate_rows['value'][(candidate_clients == client) & (candidate_rows['size'] == size)
+                                                    & (candidate_rows['encoding'] == encoding)
+                                                    & (candidate_rows['phase'] == phase)]
+            # -1 marks a failed run, it is counted but kept out of the statistics
+            baseline = baseline_all[baseline_all >= 0]
+            candidate = candidate_all[candidate_all >= 0]
+            result = {
+                'metric': metric,
+                'client': str(client),
+                'size': str(size),
+                'encoding': str(encoding),
+                'phase': str(phase),
+                'baseline_count': int(len(baseline)),
+                'candidate_count': int(len(candidate)),
+                'baseline_failures': int(len(baseline_all) - len(baseline)),
+                'candidate_failures': int(len(candidate_all) - len(candidate)),
+                'baseline_median': float(np.median(baseline)) if len(baseline) else None,
+                'candidate_median': float(np.median(candidate)) if len(candidate) else None,
+                'change': None,
+                'ci_lower': None,
+                'ci_upper': None,
+                'p_value': None,
+                'regression': False,
+            }
+            new_failures = result['candidate_failures'] > 0 and result['baseline_failures'] == 0
+            if len(baseline) and len(candidate) and result['baseline_median'] > 0:
+                result['change'] = (result['candidate_median'] - result['baseline_median']) / result['baseline_median']
+                result['ci_lower'], result['ci_upper'] = bootstrap_median_change(
+                    baseline, candidate, args.bootstrap, args.confidence, rng)
+                _, result['p_value'] = mann_whitney_u(baseline, candidate)
+                # Higher is worse for every base metric (time and memory)
+                result['regression'] = (result['change'] > args.threshold and result['p_value'] < args.alpha)
+            result['regression'] = result['regression'] or new_failures
+            comparisons.append(result)
+    return comparisons
+
+
+def format_change(value):
+    return "N/A" if value is None else f"{value * 100:+.1f}%"
+
+
+def print_comparisons(comparisons):
+    for result in comparisons:
+        formatter = METRICS[result['metric']]['formatter']
+        baseline = formatter(result['baseline_median']) if result['baseline_median'] is not None else "N/A"
+        candidate = formatter(result['candidate_median']) if result['candidate_median'] is not None else "N/A"
+        p_value = "N/A" if result['p_value'] is None else f"{result['p_value']:.4f}"
+        status = "REGRESSION" if result['regression'] else "ok"
+        print(f"[{status}] {result['metric']} {result['client']} {result['size']} {result['encoding']} {result['phase']}: "
+              f"{baseline} -> {candidate} ({format_change(result['change'])}, "
+              f"CI [{format_change(result['ci_lower'])}, {format_change(result['ci_upper'])}], p={p_value}, "
+              f"failures {result['baseline_failures']} -> {result['candidate_failures']})")
+
+
+def filter_image(table, image):
+    # Matches the image name or a digest prefix, e.g. sha256:1a2b
+    mask = (table['image'] == image) | np.char.startswith(table['image_digest'], image)
+    return select_rows(table, mask)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare two benchmark result sets')
+    parser.add_argument('--baseline', type=str, help='Results path of the baseline run', required=True)
+    parser.add_argument('--candidate', type=str, help='Results path of the candidate run, defaults to the baseline path')
+    parser.add_argument('--baselineImage', type=str, help='Only use baseline measurements of this image (name or digest)')
+    parser.add_argument('--candidateImage', type=str, help='Only use candidate measurements of this image (name or digest)')
+    parser.add_argument('--metrics', type=str, help='Comma-separated metrics to compare', default=','.join(base_metrics()))
+    parser.add_argument('--threshold', type=float, help='Relative median increase counted as a regression', default=0.05)
+    parser.add_argument('--alpha', type=float, help='Significance level of the Mann-Whitney U test', default=0.05)
+    parser.add_argument('--confidence', type=float, help='Confidence level of the bootstrap interval', default=0.95)
+    parser.add_argument('--bootstrap', type=int, help='Bootstrap iterations', default=5000)
+    parser.add_argument('--seed', type=int, help='Seed of the bootstrap resampling', default=0)
+    parser.add_argument('--output', type=str, help='Where to write comparison.json', default='results/comparison')
+
+    args = parser.parse_args()
+
+    metrics = [metric for metric in args.metrics.split(',') if metric]
+    candidate_path = args.candidate or args.baseline
+    if os.path.abspath(candidate_path) == os.path.abspath(args.baseline) and \
+            not (args.baselineImage and args.candidateImage):
+        # Otherwise a result set is compared with (part of) itself and the gate always passes
+        parser.error('comparing a result set with itself needs both --baselineImage and --candidateImage, '
+                     'or pass a different --candidate')
+    baseline_table = load_table(args.baseline, metrics)
+    candidate_table = load_table(candidate_path, metrics)
+    if args.baselineImage:
+        baseline_table = filter_image(baseline_table, args.baselineImage)
+    if args.candidateImage:
+        candidate_table = filter_image(candidate_table, args.candidateImage)
+
+    # Two images of the same client in one sweep are usually run under tagged names (geth_new)
+    by_base_client = bool(args.baselineImage or args.candidateImage)
+    comparisons = compare_groups(baseline_table, candidate_table, metrics, args, by_base_client)
+    print_comparisons(comparisons)
+
+    os.makedirs(args.output, exist_ok=True)
+    output_path = os.path.join(args.output, 'comparison.json')
+    with open(output_path, 'w') as json_file:
+        json.dump({
+            'baseline': {'path': args.baseline, 'image': args.baselineImage},
+            'candidate': {'path': candidate_path, 'image': args.candidateImage},
+            'threshold': args.threshold,
+            'alpha': args.alpha,
+            'confidence': args.confidence,
+            'comparisons': comparisons,
+        }, json_file, indent=4)
+    print(f"Comparison saved to {output_path}")
+
+    regressions = [result for result in comparisons if result['regression']]
+    if regressions:
+        print(f"{len(regressions)} regression(s) beyond {args.threshold * 100:.1f}%")
+        sys.exit(1)
+    print("No regressions")
+
+
+if __name__ == '__main__':
+    main()
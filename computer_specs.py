@@ -4,6 +4,7 @@ import datetime
 import json
 import os
 import subprocess
+import time
 import cpuinfo
 import psutil
 import platform
@@ -17,6 +18,7 @@ def print_computer_specs():
     except AttributeError:
         cpu_freq = "N/A"
     system_info = {
+        'Hostname': platform.node(),
         'Processor': platform.processor(),
         'System': platform.system(),
         'Release': platform.release(),
@@ -36,21 +38,105 @@ def print_computer_specs():
         info += line + "\n"
     return info + "\n"
 
+def get_disk_type(path):
+    # Resolves the block device holding path through sysfs, partitions report their parent disk
+    try:
+        device = os.stat(path).st_dev
+        block_path = os.path.realpath(f'/sys/dev/block/{os.major(device)}:{os.minor(device)}')
+        if not os.path.exists(os.path.join(block_path, 'queue')):
+            block_path = os.path.dirname(block_path)
+        name = os.path.basename(block_path)
+        with open(os.path.join(block_path, 'queue', 'rotational'), 'r') as file:
+            rotational = file.read().strip() == '1'
+    except (OSError, ValueError):
+        return 'unknown'
+    if name.startswith('nvme'):
+        return 'nvme'
+    return 'hdd' if rotational else 'ssd'
+
+
+def benchmark_cpu(accounts=50000, rounds=3):
+    # JSON round trip of a genesis-like alloc, the same kind of work the clients do on import
+    alloc = {f'0x{index:040x}': {'balance': hex(index * 1000000007)} for index in range(accounts)}
+    payload = json.dumps(alloc)
+    best = None
+    for _ in range(rounds):
+        start = time.perf_counter()
+        json.loads(json.dumps(json.loads(payload)))
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return 2 * len(payload) / (1024 * 1024) / best
+
+
+def benchmark_disk(output_folder, size_mb=256):
+    path = os.path.join(output_folder, '.disk_benchmark')
+    block = os.urandom(1024 * 1024)
+    try:
+        start = time.perf_counter()
+        with open(path, 'wb') as file:
+            for _ in range(size_mb):
+                file.write(block)
+            file.flush()
+            os.fsync(file.fileno())
+        write_speed = size_mb / (time.perf_counter() - start)
+
+        # Drop the file from the page cache so the read hits the disk
+        with open(path, 'rb') as file:
+            if hasattr(os, 'posix_fadvise'):
+                os.posix_fadvise(file.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+            start = time.perf_counter()
+            while file.read(1024 * 1024):
+                pass
+        read_speed = size_mb / (time.perf_counter() - start)
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
+    return write_speed, read_speed
+
+
+def get_host_fingerprint(output_folder, run_benchmark=True):
+    cpu = cpuinfo.get_cpu_info()
+    fingerprint = {
+        'hostname': platform.node(),
+        'cpu_model': cpu['brand_raw'],
+        'logical_cores': psutil.cpu_count(logical=True),
+        'physical_cores': psutil.cpu_count(logical=False),
+        'ram_bytes': psutil.virtual_memory().total,
+        'disk_type': get_disk_type(output_folder),
+        'kernel': platform.release(),
+        'scores': {},
+    }
+    if run_benchmark:
+        print("Running host micro-benchmarks...")
+        write_speed, read_speed = benchmark_disk(output_folder)
+        fingerprint['scores'] = {
+            'cpu_json_mb_per_s': round(benchmark_cpu(), 2),
+            'disk_write_mb_per_s': round(write_speed, 2),
+            'disk_read_mb_per_s': round(read_speed, 2),
+        }
+        for key, value in fingerprint['scores'].items():
+            print(f'{key}: {value}')
+    return fingerprint
+
+
 def save_to(output_folder, file_name, content):
     output_path = os.path.join(output_folder, file_name)
     with open(output_path, "w") as file:
         file.write(content)
 
 
-def main(output_folder):
+def main(output_folder, run_benchmark=True):
     # Print Computer specs
     computer_specs = print_computer_specs()
     save_to(output_folder, 'computer_specs.txt', computer_specs)
+    fingerprint = get_host_fingerprint(output_folder, run_benchmark)
+    save_to(output_folder, 'host_fingerprint.json', json.dumps(fingerprint, indent=4))
 
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='Computer Specs Script')
     parser.add_argument('--output_folder', type=str, default='results', help='The folder to save the output files')
+    parser.add_argument('--skip_benchmark', action='store_true', help='Do not run the CPU and disk micro-benchmarks')
     args = parser.parse_args()
     
-    main(args.output_folder)
+    main(args.output_folder, not args.skip_benchmark)
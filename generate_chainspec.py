@@ -1,9 +1,9 @@
 import json
 import random
-import os
 import sys
 import threading
 from queue import Queue
+from genesis_encoding import DEFAULT_ENCODING, parse_encodings, write_encodings
 
 def generate_random_address():
     return '0x' + ''.join(random.choices('0123456789abcdef', k=40))
@@ -11,7 +11,7 @@ def generate_random_address():
 def generate_random_balance():
     return hex(random.randint(1, 10**18))
 
-def create_large_chainspec(input_file, output_file, target_size, initial_batch_size=1000):
+def create_large_chainspec(input_file, output_file, target_size, initial_batch_size=1000, encodings=(DEFAULT_ENCODING,)):
     try:
         with open(input_file, 'r') as f:
             chainspec = json.load(f)
@@ -69,19 +69,16 @@ def create_large_chainspec(input_file, output_file, target_size, initial_batch_s
     for thread in threads:
         thread.join()
 
-    chainspec['accounts'] = accounts
-
     try:
-        with open(output_file, 'w', encoding='utf-8') as out_file:
-            json.dump(chainspec, out_file, indent=2)
-        actual_size = os.path.getsize(output_file)
-        print(f"Generated {output_file} with actual size {actual_size / 1024 / 1024:.2f} MB")
+        write_encodings(chainspec, 'accounts', accounts, output_file, encodings)
     except Exception as e:
         print(f"Error writing to {output_file}: {e}")
 
 if __name__ == "__main__":
-    if len(sys.argv) != 4:
-        print("Usage: python script.py <input_file> <output_file> <target_size_in_MB>")
+    if len(sys.argv) not in (4, 5):
+        print("Usage: python script.py <input_file> <output_file> <target_size_in_MB> [encodings]")
+        print(f"Example encodings: {DEFAULT_ENCODING} (default), {DEFAULT_ENCODING},minified-sorted-padded")
+        print("With several encodings each one is written to <output_file minus .json>.<encoding>.json")
         sys.exit(1)
 
     input_file = sys.argv[1]
@@ -91,5 +88,10 @@ if __name__ == "__main__":
     except ValueError:
         print("Target size must be a number")
         sys.exit(1)
+    try:
+        encodings = parse_encodings(sys.argv[4] if len(sys.argv) == 5 else DEFAULT_ENCODING)
+    except ValueError as e:
+        print(e)
+        sys.exit(1)
 
-    create_large_chainspec(input_file, output_file, target_size)
+    create_large_chainspec(input_file, output_file, target_size, encodings=encodings)
@@ -0,0 +1,75 @@
+# Encoding labels are <layout>-<order>-<balance>:
+#   layout:  indent (json indent=2) or minified (no whitespace)
+#   order:   random (alloc keys in generation order; the addresses are random, so this is
+#            effectively hash order) or sorted (alloc keys in ascending order)
+#   balance: hex (balances as written), compact (0x-prefixed, lowercase, no leading zeros)
+#            or padded (0x-prefixed, lowercase, 64 hex digits)
+import json
+import os
+
+LAYOUTS = ('indent', 'minified')
+ORDERS = ('random', 'sorted')
+BALANCES = ('hex', 'compact', 'padded')
+DEFAULT_ENCODING = 'indent-random-hex'
+
+
+def parse_encoding(label):
+    parts = label.split('-')
+    if len(parts) != 3 or parts[0] not in LAYOUTS or parts[1] not in ORDERS or parts[2] not in BALANCES:
+        raise ValueError(f"Invalid encoding '{label}', expected <{'|'.join(LAYOUTS)}>-<{'|'.join(ORDERS)}>-"
+                         f"<{'|'.join(BALANCES)}>")
+    return {'layout': parts[0], 'order': parts[1], 'balance': parts[2]}
+
+
+def parse_encodings(value):
+    encodings = [label for label in value.split(',') if label] or [DEFAULT_ENCODING]
+    for label in encodings:
+        parse_encoding(label)
+    return encodings
+
+
+def format_balance(balance, style):
+    if style == 'padded':
+        return '0x' + format(int(balance, 16), '064x')
+    if style == 'compact':
+        return hex(int(balance, 16))
+    return balance
+
+
+def encode_accounts(accounts, encoding):
+    # Only the representation changes, the accounts and balances stay the same
+    settings = parse_encoding(encoding)
+    addresses = sorted(accounts) if settings['order'] == 'sorted' else list(accounts)
+    encoded = {}
+    for address in addresses:
+        account = accounts[address]
+        if settings['balance'] != 'hex' and isinstance(account, dict) and isinstance(account.get('balance'), str) and account['balance'].startswith('0x'):
+            account = dict(account, balance=format_balance(account['balance'], settings['balance']))
+        encoded[address] = account
+    return encoded
+
+
+def dump_kwargs(encoding):
+    if parse_encoding(encoding)['layout'] == 'minified':
+        return {'separators': (',', ':')}
+    return {'indent': 2}
+
+
+def encoded_path(output_file, encoding):
+    root, extension = os.path.splitext(output_file)
+    return f"{root}.{encoding}{extension}"
+
+
+def write_encodings(document, alloc_key, accounts, output_file, encodings):
+    # Every encoding is written from the same accounts, a single encoding keeps the plain output name
+    for encoding in encodings:
+        path = output_file if len(encodings) == 1 else encoded_path(output_file, encoding)
+        document[alloc_key] = encode_accounts(accounts, encoding)
+        with open(path, 'w', encoding='utf-8') as out_file:
+            json.dump(document, out_file, **dump_kwargs(encoding))
+        actual_size = os.path.getsize(path)
+        print(f"Generated {path} with actual size {actual_size / 1024 / 1024:.2f} MB")
+        # Sidecar read by the runners so every result knows the real genesis size and account count
+        with open(path + '.meta.json', 'w', encoding='utf-8') as meta_file:
+            json.dump({'bytes': actual_size, 'accounts': len(accounts), 'encoding': encoding}, meta_file)
+    document[alloc_key] = accounts
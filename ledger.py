@@ -0,0 +1,136 @@
+import argparse
+import json
+import os
+import time
+
+LEDGER_FILE = 'ledger.jsonl'
+
+
+def append_record(ledger_path, record):
+    # One write per line keeps appends from parallel lanes from interleaving
+    line = json.dumps(record, sort_keys=True) + "\n"
+    with open(ledger_path, 'a') as file:
+        file.write(line)
+
+
+def read_records(ledger_path):
+    with open(ledger_path, 'r') as file:
+        for line_number, line in enumerate(file, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                print(f"Skipping invalid ledger line {line_number} in {ledger_path}")
+
+
+def import_legacy_results(results_path, metric, unit):
+    # Converts the old <client>_<run>_<phase>_<size>.txt files, client names must not contain '_'
+    ledger_path = os.path.join(results_path, LEDGER_FILE)
+    # Files imported by an earlier run are skipped, so importing twice does not duplicate measurements
+    already_imported = set()
+    if os.path.exists(ledger_path):
+        for record in read_records(ledger_path):
+            sampler = record.get('sampler') or {}
+            if sampler.get('type') == 'legacy':
+                already_imported.add(sampler.get('file'))
+    imported = 0
+    skipped = 0
+    for filename in sorted(os.listdir(results_path)):
+        if not filename.endswith('.txt') or filename == "computer_specs.txt":
+            continue
+        if filename in already_imported:
+            skipped += 1
+            continue
+        parts = filename[:-len('.txt')].rsplit('_', 3)
+        if len(parts) != 4:
+            print(f"Filename {filename} does not match expected pattern")
+            continue
+        client, run, phase, size = parts
+        try:
+            with open(os.path.join(results_path, filename), 'r') as file:
+                value = float(file.read().strip())
+            run = int(run)
+        except ValueError:
+            print(f"Skipping file {filename} due to invalid content")
+            continue
+        append_record(ledger_path, {
+            'client': client,
+            'image': None,
+            'image_digest': None,
+            'size': size,
+            'run': run,
+            'phase': phase,
+            'metric': metric,
+            'value': value,
+            'unit': unit,
+            'lane': 0,
+            'sampler': {'type': 'legacy', 'file': filename},
+        })
+        imported += 1
+    print(f"Imported {imported} legacy results into {ledger_path}")
+    if skipped:
+        print(f"Skipped {skipped} legacy results that were already imported")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Results ledger')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    append_parser = subparsers.add_parser('append', help='Append one measurement to the ledger.')
+    append_parser.add_argument('--ledger', type=str, help='Ledger file to append to.', required=True)
+    append_parser.add_argument('--client', type=str, required=True)
+    append_parser.add_argument('--image', type=str, default='')
+    append_parser.add_argument('--image-digest', type=str, default='')
+    append_parser.add_argument('--size', type=str, help='Genesis size, e.g. 10M.', required=True)
+    append_parser.add_argument('--run', type=int, required=True)
+    append_parser.add_argument('--phase', type=str, help='first or second start.', required=True)
+    append_parser.add_argument('--metric', type=str, help='speed or memory.', required=True)
+    append_parser.add_argument('--value', type=float, required=True)
+    append_parser.add_argument('--unit', type=str, default='')
+    append_parser.add_argument('--genesis-bytes', type=str, help='Actual size of the imported genesis file.', default='')
+    append_parser.add_argument('--accounts', type=str, help='Number of accounts in the imported genesis.', default='')
+    append_parser.add_argument('--encoding', type=str, help='Encoding of the imported genesis, see genesis_encoding.py.',
+                               default='')
+    append_parser.add_argument('--lane', type=int, default=0)
+    append_parser.add_argument('--cpuset', type=str, default='')
+    append_parser.add_argument('--start-ms', type=int, default=None)
+    append_parser.add_argument('--end-ms', type=int, default=None)
+    append_parser.add_argument('--sampler', type=str, help='JSON object describing how the value was sampled.',
+                               default='{}')
+
+    import_parser = subparsers.add_parser('import-legacy', help='Convert per-measurement .txt files.')
+    import_parser.add_argument('--resultsPath', type=str, help='Directory with the .txt results.', required=True)
+    import_parser.add_argument('--metric', type=str, help='speed or memory.', required=True)
+    import_parser.add_argument('--unit', type=str, default='')
+
+    args = parser.parse_args()
+
+    if args.command == 'append':
+        append_record(args.ledger, {
+            'client': args.client,
+            'image': args.image or None,
+            'image_digest': args.image_digest or None,
+            'size': args.size,
+            'run': args.run,
+            'phase': args.phase,
+            'metric': args.metric,
+            'value': args.value,
+            'unit': args.unit,
+            'genesis_bytes': int(args.genesis_bytes) if args.genesis_bytes else None,
+            'accounts': int(args.accounts) if args.accounts else None,
+            'encoding': args.encoding or None,
+            'lane': args.lane,
+            'cpuset': args.cpuset,
+            'start_ms': args.start_ms,
+            'end_ms': args.end_ms,
+            'recorded_at': int(time.time() * 1000),
+            'sampler': json.loads(args.sampler),
+        })
+    elif args.command == 'import-legacy':
+        import_legacy_results(args.resultsPath, args.metric, args.unit)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+import argparse
+import json
+import os
+import signal
+import subprocess
+import time
+
+BYTES_PER_MB = 1024 * 1024
+COMPONENTS = ('anon', 'file', 'kernel', 'shmem')
+# Kernel memory split in cgroup v2 kernels that do not report the "kernel" total yet
+KERNEL_PARTS = ('kernel_stack', 'pagetables', 'percpu', 'sock', 'slab', 'vmalloc')
+CGROUP_TEMPLATES = (
+    '/sys/fs/cgroup/system.slice/docker-{id}.scope',
+    '/sys/fs/cgroup/docker/{id}',
+    '/sys/fs/cgroup/memory/docker/{id}',
+    '/sys/fs/cgroup/memory/system.slice/docker-{id}.scope',
+)
+
+
+def find_cgroup(container_name):
+    result = subprocess.run(['docker', 'inspect', '--format', '{{.Id}}', container_name],
+                            capture_output=True, text=True)
+    container_id = result.stdout.strip()
+    if result.returncode != 0 or not container_id:
+        return None
+    for template in CGROUP_TEMPLATES:
+        path = template.format(id=container_id)
+        if os.path.exists(os.path.join(path, 'memory.stat')):
+            return path
+    return None
+
+
+def read_stat(cgroup_path):
+    stat = {}
+    with open(os.path.join(cgroup_path, 'memory.stat'), 'r') as file:
+        for line in file:
+            key, value = line.split()
+            stat[key] = int(value)
+    return stat
+
+
+def read_usage(cgroup_path, stat):
+    for file_name in ('memory.current', 'memory.usage_in_bytes'):
+        path = os.path.join(cgroup_path, file_name)
+        if os.path.exists(path):
+            with open(path, 'r') as file:
+                return int(file.read().strip())
+    return sum(stat.get(component, 0) for component in ('anon', 'file', 'kernel'))
+
+
+def read_composition(cgroup_path):
+    stat = read_stat(cgroup_path)
+    if 'anon' in stat:
+        # cgroup v2
+        kernel = stat['kernel'] if 'kernel' in stat else sum(stat.get(part, 0) for part in KERNEL_PARTS)
+        composition = {'anon': stat['anon'], 'file': stat.get('file', 0), 'kernel': kernel, 'shmem': stat.get('shmem', 0)}
+    else:
+        # cgroup v1 reports anonymous memory as rss and the page cache as cache
+        kernel = 0
+        kmem_path = os.path.join(cgroup_path, 'memory.kmem.usage_in_bytes')
+        if os.path.exists(kmem_path):
+            with open(kmem_path, 'r') as file:
+                kernel = int(file.read().strip())
+        composition = {'anon': stat.get('total_rss', stat.get('rss', 0)),
+                       'file': stat.get('total_cache', stat.get('cache', 0)),
+                       'kernel': kernel,
+                       'shmem': stat.get('total_shmem', stat.get('shmem', 0))}
+    composition['total'] = read_usage(cgroup_path, stat)
+    return composition
+
+
+def to_mb(composition):
+    return {key: round(value / BYTES_PER_MB, 2) for key, value in composition.items()}
+
+
+def write_summary(summary_path, summary):
+    temporary_path = summary_path + '.tmp'
+    with open(temporary_path, 'w') as file:
+        json.dump(summary, file, indent=4)
+    os.replace(temporary_path, summary_path)
+
+
+def sample(container_name, samples_path, summary_path, interval):
+    stopped = []
+    signal.signal(signal.SIGTERM, lambda signum, frame: stopped.append(signum))
+    summary = {
+        'container': container_name,
+        # Relative to the summary, so results can be moved or copied as a directory
+        'samples_file': os.path.relpath(samples_path, os.path.dirname(os.path.abspath(summary_path))),
+        'samples': 0,
+        'peak_total_mb': -1,
+        'peak_anon_mb': -1,
+        'at_peak': None,
+    }
+    cgroup_path = None
+    start = time.monotonic()
+    with open(samples_path, 'a') as samples_file:
+        while not stopped:
+            # The container may not exist yet or may be recreated, so the cgroup is resolved again on failure
+            if cgroup_path is None:
+                cgroup_path = find_cgroup(container_name)
+            if cgroup_path is not None:
+                try:
+                    composition = read_composition(cgroup_path)
+                except (OSError, ValueError):
+                    cgroup_path = None
+                    composition = None
+                if composition is not None:
+                    composition_mb = to_mb(composition)
+                    samples_file.write(json.dumps(dict(composition_mb, t=round(time.monotonic() - start, 3))) + "\n")
+                    samples_file.flush()
+                    summary['samples'] += 1
+                    if composition_mb['total'] > summary['peak_total_mb']:
+                        summary['peak_total_mb'] = composition_mb['total']
+                        summary['at_peak'] = composition_mb
+                    summary['peak_anon_mb'] = max(summary['peak_anon_mb'], composition_mb['anon'])
+                    write_summary(summary_path, summary)
+            time.sleep(interval)
+    write_summary(summary_path, summary)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Container memory composition sampler')
+    parser.add_argument('--container', type=str, help='Container to sample.', required=True)
+    parser.add_argument('--samples', type=str, help='JSONL file receiving one line per sample.', required=True)
+    parser.add_argument('--summary', type=str, help='JSON file with the peaks and the composition at the peak.',
+                        required=True)
+    parser.add_argument('--interval', type=float, help='Seconds between samples.', default=1)
+
+    args = parser.parse_args()
+    sample(args.container, args.samples, args.summary, args.interval)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,19 @@
+import argparse
+import datetime
 import os
 import json
 import sys
+from ledger import LEDGER_FILE, append_record, read_records
+
+DATA_TYPES = ('speed', 'memory')
+# Metrics that depend on host speed, memory usage is compared as measured
+NORMALIZED_METRICS = ('speed',)
+NORMALIZATION_SCORES = {
+    'cpu': ('cpu_json_mb_per_s',),
+    'disk': ('disk_write_mb_per_s', 'disk_read_mb_per_s'),
+    'combined': ('cpu_json_mb_per_s', 'disk_write_mb_per_s', 'disk_read_mb_per_s'),
+}
+
 
 def merge_json_files(date_str):
     base_dir = f'results-{date_str}'
@@ -36,10 +49,124 @@ def merge_json_files(date_str):
 
     print(f"Merged data saved to {result_file_path}")
 
+
+def read_fingerprint(data_path):
+    fingerprint_path = os.path.join(data_path, 'host_fingerprint.json')
+    if not os.path.exists(fingerprint_path):
+        return None
+    with open(fingerprint_path, 'r') as file:
+        return json.load(file)
+
+
+def host_score(fingerprint, normalize):
+    # Geometric mean of the selected micro-benchmark scores, higher means a faster host
+    scores = [fingerprint.get('scores', {}).get(key) for key in NORMALIZATION_SCORES[normalize]]
+    if not all(scores):
+        return None
+    product = 1.0
+    for score in scores:
+        product *= score
+    return product ** (1 / len(scores))
+
+
+def source_date(record, host_dir):
+    # Keep the date of the sweep a record came from, the merged directory has none of its own
+    if record.get('date'):
+        return record['date']
+    if record.get('recorded_at'):
+        return datetime.datetime.fromtimestamp(record['recorded_at'] / 1000).strftime('%Y%m%d')
+    name = os.path.basename(os.path.normpath(host_dir))
+    if name.startswith('results-') and name[len('results-'):].isdigit():
+        return name[len('results-'):]
+    return None
+
+
+def merge_hosts(host_dirs, output_dir, normalize, reference):
+    for data_type in DATA_TYPES:
+        fingerprints = {}
+        for host_dir in host_dirs:
+            data_path = os.path.join(host_dir, data_type)
+            if not os.path.exists(os.path.join(data_path, LEDGER_FILE)):
+                continue
+            fingerprint = read_fingerprint(data_path) or {'hostname': os.path.basename(os.path.normpath(host_dir))}
+            fingerprints[host_dir] = fingerprint
+        if not fingerprints:
+            print(f"No {data_type} ledgers found")
+            continue
+
+        factors = {host_dir: 1.0 for host_dir in fingerprints}
+        if normalize != 'none':
+            if reference:
+                reference_dir = next((host_dir for host_dir, fingerprint in fingerprints.items()
+                                      if fingerprint.get('hostname') == reference), None)
+                if reference_dir is None:
+                    print(f"Reference host {reference} not found, available hosts: "
+                          f"{', '.join(str(fingerprint.get('hostname')) for fingerprint in fingerprints.values())}")
+                    sys.exit(1)
+            else:
+                reference_dir = next(iter(fingerprints))
+            reference_score = host_score(fingerprints[reference_dir], normalize)
+            if reference_score is None:
+                print(f"Reference host {fingerprints[reference_dir].get('hostname')} has no {normalize} score")
+                sys.exit(1)
+            for host_dir, fingerprint in fingerprints.items():
+                score = host_score(fingerprint, normalize)
+                if score is None:
+                    print(f"Host {fingerprint.get('hostname')} has no {normalize} score")
+                    sys.exit(1)
+                # A host twice as fast as the reference gets its times doubled to match the reference
+                factors[host_dir] = score / reference_score
+
+        output_path = os.path.join(output_dir, data_type)
+        os.makedirs(output_path, exist_ok=True)
+        ledger_path = os.path.join(output_path, LEDGER_FILE)
+        if os.path.exists(ledger_path):
+            os.remove(ledger_path)
+        for host_dir, fingerprint in fingerprints.items():
+            merged = 0
+            for record in read_records(os.path.join(host_dir, data_type, LEDGER_FILE)):
+                record['host'] = fingerprint.get('hostname')
+                record['date'] = source_date(record, host_dir)
+                record['raw_value'] = record['value']
+                record['normalization'] = {'mode': normalize, 'factor': factors[host_dir]}
+                if record['metric'] in NORMALIZED_METRICS and record['value'] >= 0:
+                    record['value'] = record['value'] * factors[host_dir]
+                append_record(ledger_path, record)
+                merged += 1
+            print(f"Merged {merged} {data_type} records from {fingerprint.get('hostname')} "
+                  f"(factor {factors[host_dir]:.3f})")
+
+        with open(os.path.join(output_path, 'hosts.json'), 'w') as file:
+            json.dump({'normalize': normalize,
+                       'hosts': [dict(fingerprint, factor=factors[host_dir])
+                                 for host_dir, fingerprint in fingerprints.items()]}, file, indent=4)
+        # The reports print computer_specs.txt as is, so list every host that contributed
+        with open(os.path.join(output_path, 'computer_specs.txt'), 'w') as file:
+            file.write(f"Computer Specs ({len(fingerprints)} hosts, normalization: {normalize}):\n")
+            for host_dir, fingerprint in fingerprints.items():
+                file.write(f"{fingerprint.get('hostname')}: {fingerprint.get('cpu_model', 'N/A')}, "
+                           f"{fingerprint.get('logical_cores', 'N/A')} cores, "
+                           f"{fingerprint.get('ram_bytes', 0) / (1024 ** 3):.2f} GB RAM, "
+                           f"{fingerprint.get('disk_type', 'N/A')}, kernel {fingerprint.get('kernel', 'N/A')}, "
+                           f"factor {factors[host_dir]:.3f}\n")
+    print(f"Merged results saved to {output_dir}")
+
+
 if __name__ == "__main__":
-    if len(sys.argv) != 2:
-        print("Usage: python merge_json.py <date>")
-        print("Example: python merge_json.py 20230102")
+    parser = argparse.ArgumentParser(description='Merge benchmark results')
+    parser.add_argument('date', nargs='?', help='Merge results-<date>/speed and memory reports into result.json')
+    parser.add_argument('--hosts', nargs='+', help='Result directories of several hosts, each with speed/ and memory/')
+    parser.add_argument('--output', type=str, help='Where to write the merged multi-host results', default='merged-results')
+    parser.add_argument('--normalize', type=str, choices=['none'] + list(NORMALIZATION_SCORES), default='none',
+                        help='Scale speed results by the host micro-benchmark scores')
+    parser.add_argument('--reference', type=str, help='Hostname the results are normalized to, defaults to the first host')
+    args = parser.parse_args()
+
+    if args.hosts:
+        merge_hosts(args.hosts, args.output, args.normalize, args.reference)
+    elif args.date:
+        merge_json_files(args.date)
     else:
-        date_str = sys.argv[1]
-        merge_json_files(date_str)
\ No newline at end of file
+        print("Usage: python merge_result.py <date>")
+        print("Example: python merge_result.py 20230102")
+        print("       python merge_result.py --hosts results-hostA results-hostB --normalize cpu")
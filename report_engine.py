@@ -0,0 +1,492 @@
+import argparse
+import html
+import json
+import os
+import numpy as np
+import yaml
+from genesis_encoding import DEFAULT_ENCODING
+from ledger import LEDGER_FILE, read_records
+from scaling import fit_scaling, predict, public_fit
+from setup_node import LOCAL_IMAGES
+
+GROUP_KEYS = ('metric', 'client', 'size', 'encoding', 'phase')
+TEXT_COLUMNS = GROUP_KEYS + ('image', 'image_digest')
+NUMERIC_COLUMNS = ('value', 'genesis_bytes', 'accounts')
+PERCENTILES = (50, 95, 99)
+BYTES_PER_MB = 1024 * 1024
+METRICS = {}
+
+
+def register_metric(name, title, formatter, cast=float, unit='', source=None, derive=None):
+    # cast converts every statistic before it is written, formatter renders it in the HTML table.
+    # Metrics with a source are reported alongside it: without derive they are read from the
+    # ledger as is, with derive(value, genesis_bytes, accounts) they are computed from the source rows.
+    METRICS[name] = {
+        'title': title,
+        'formatter': formatter,
+        'cast': cast,
+        'unit': unit,
+        'source': source,
+        'derive': derive,
+    }
+
+
+def ms_to_readable_time(ms):
+    if ms is None:
+        return "N/A"
+
+    if ms == -1:
+        return "∞"
+
+    seconds = ms / 1000
+
+    if seconds < 1:
+        return f"{ms:.0f}ms"
+
+    if seconds < 60:
+        return f"{int(seconds)}s"
+
+    minutes = int(seconds // 60)
+    remaining_seconds = int(seconds % 60)
+
+    return f"{minutes}min{remaining_seconds}s"
+
+
+def convert_to_gigabytes_str(value_in_megabytes):
+    if value_in_megabytes is None:
+        return "N/A"
+    if value_in_megabytes < 0:
+        return "∞"
+    return f"{value_in_megabytes / 1024:.2f}G"
+
+
+def format_rate(unit):
+    def formatter(value):
+        if value is None or value < 0:
+            return "N/A"
+        return f"{value:,.1f} {unit}"
+    return formatter
+
+
+def format_ratio(value):
+    if value is None or value < 0:
+        return "N/A"
+    return f"{value:.2f}x"
+
+
+def format_bytes(value):
+    if value is None or value < 0:
+        return "N/A"
+    return f"{value:,.0f} B"
+
+
+register_metric('speed', 'Speed', ms_to_readable_time, cast=int, unit='ms')
+register_metric('memory', 'Memory', convert_to_gigabytes_str, unit='MB')
+register_metric('import_mb_per_s', 'Genesis Import Throughput (MB/s)', format_rate('MB/s'), unit='MB/s', source='speed',
+                derive=lambda value, genesis_bytes, accounts: genesis_bytes / BYTES_PER_MB / (value / 1000))
+register_metric('import_accounts_per_s', 'Genesis Import Throughput (accounts/s)', format_rate('accounts/s'),
+                unit='accounts/s', source='speed', derive=lambda value, genesis_bytes, accounts: accounts / (value / 1000))
+register_metric('memory_bytes_per_account', 'Memory per Account', format_bytes, unit='B', source='memory',
+                derive=lambda value, genesis_bytes, accounts: value * BYTES_PER_MB / accounts)
+register_metric('memory_anon', 'Peak Anonymous Memory', convert_to_gigabytes_str, unit='MB', source='memory')
+register_metric('memory_file', 'Page Cache at Peak', convert_to_gigabytes_str, unit='MB', source='memory')
+register_metric('memory_kernel', 'Kernel Memory at Peak', convert_to_gigabytes_str, unit='MB', source='memory')
+register_metric('memory_shmem', 'Shared Memory at Peak', convert_to_gigabytes_str, unit='MB', source='memory')
+register_metric('anon_amplification', 'Anon Memory Amplification (peak anon / genesis size)', format_ratio,
+                unit='x', source='memory_anon',
+                derive=lambda value, genesis_bytes, accounts: value * BYTES_PER_MB / genesis_bytes)
+register_metric('anon_bytes_per_account', 'Peak Anonymous Memory per Account', format_bytes, unit='B',
+                source='memory_anon', derive=lambda value, genesis_bytes, accounts: value * BYTES_PER_MB / accounts)
+
+
+def size_label_bytes(size):
+    try:
+        return float(size.replace('M', '')) * BYTES_PER_MB
+    except ValueError:
+        return np.nan
+
+
+def load_table(results_path, metrics=None):
+    # Columnar view of the ledger: one numpy array per field, one row per measurement
+    columns = {key: [] for key in TEXT_COLUMNS + NUMERIC_COLUMNS}
+    ledger_path = os.path.join(results_path, LEDGER_FILE)
+    if not os.path.exists(ledger_path):
+        print(f"Ledger not found: {ledger_path}")
+    else:
+        for record in read_records(ledger_path):
+            if metrics is not None and record.get('metric') not in metrics:
+                continue
+            for key in GROUP_KEYS:
+                columns[key].append(str(record.get(key) or DEFAULT_ENCODING) if key == 'encoding' else str(record[key]))
+            columns['image'].append(record.get('image') or '')
+            columns['image_digest'].append(record.get('image_digest') or '')
+            columns['value'].append(record['value'])
+            # Records written before the generators reported sizes fall back to the size label
+            genesis_bytes = record.get('genesis_bytes')
+            columns['genesis_bytes'].append(genesis_bytes if genesis_bytes else size_label_bytes(str(record['size'])))
+            accounts = record.get('accounts')
+            columns['accounts'].append(accounts if accounts else np.nan)
+    table = {key: np.array(columns[key], dtype=str) for key in TEXT_COLUMNS}
+    for key in NUMERIC_COLUMNS:
+        table[key] = np.array(columns[key], dtype=float)
+    return table
+
+
+def concat_tables(tables):
+    return {key: np.concatenate([table[key] for table in tables]) for key in tables[0]}
+
+
+def select_rows(table, mask):
+    return {key: column[mask] for key, column in table.items()}
+
+
+def base_metrics():
+    return [name for name, metric in METRICS.items() if metric['source'] is None]
+
+
+def derived_metrics_for(metrics):
+    # Follows chains such as memory -> memory_anon -> anon_amplification, in registration order
+    related = []
+    sources = set(metrics)
+    for name, metric in METRICS.items():
+        if metric['source'] in sources:
+            related.append(name)
+            sources.add(name)
+    return related
+
+
+def ledger_metrics_for(metrics):
+    return list(metrics) + [name for name in derived_metrics_for(metrics) if METRICS[name]['derive'] is None]
+
+
+def add_derived_rows(table, metrics):
+    tables = [table]
+    for name in derived_metrics_for(metrics):
+        definition = METRICS[name]
+        if definition['derive'] is None:
+            continue
+        # Failed runs (-1) and measurements without a known genesis size have no throughput
+        rows = select_rows(table, (table['metric'] == definition['source']) & (table['value'] > 0))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            derived = definition['derive'](rows['value'], rows['genesis_bytes'], rows['accounts'])
+        valid = np.isfinite(derived)
+        rows = select_rows(rows, valid)
+        rows['value'] = derived[valid]
+        rows['metric'] = np.full(len(rows['value']), name)
+        tables.append(rows)
+    return concat_tables(tables)
+
+
+def group_statistics(table, keys=GROUP_KEYS, percentiles=PERCENTILES):
+    values = table['value']
+    if len(values) == 0:
+        return {'keys': {key: np.array([], dtype=str) for key in keys}, 'stats': {}}
+
+    codes = [np.unique(table[key], return_inverse=True)[1] for key in keys]
+    # lexsort uses the last key as primary, values come first so each group ends up sorted
+    order = np.lexsort([values] + codes[::-1])
+    sorted_values = values[order]
+    sorted_codes = np.stack([code[order] for code in codes])
+
+    group_change = np.any(sorted_codes[:, 1:] != sorted_codes[:, :-1], axis=0)
+    starts = np.concatenate(([0], np.flatnonzero(group_change) + 1))
+    counts = np.diff(np.concatenate((starts, [len(sorted_values)])))
+    ends = starts + counts - 1
+
+    stats = {
+        'max': sorted_values[ends],
+        'min': sorted_values[starts],
+        'count': counts,
+    }
+    # Same linear interpolation as np.percentile, applied to every group at once
+    for percentile in percentiles:
+        position = starts + (counts - 1) * percentile / 100
+        lower = np.floor(position).astype(int)
+        upper = np.ceil(position).astype(int)
+        fraction = position - lower
+        stats[f'p{percentile}'] = sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * fraction
+
+    group_keys = {key: table[key][order][starts] for key in keys}
+    return {'keys': group_keys, 'stats': stats}
+
+
+def variant_key(label, encoding):
+    # The default encoding keeps the historical keys, other encodings are appended as label@encoding
+    if encoding == DEFAULT_ENCODING:
+        return label
+    return f'{label}@{encoding}'
+
+
+def split_variant(key):
+    label, _, encoding = key.partition('@')
+    return label, encoding or DEFAULT_ENCODING
+
+
+def to_nested_results(grouped, metric):
+    cast = METRICS[metric]['cast']
+    keys = grouped['keys']
+    stats = grouped['stats']
+    processed_results = {}
+    for index in np.flatnonzero(keys['metric'] == metric):
+        client = str(keys['client'][index])
+        size = variant_key(str(keys['size'][index]), str(keys['encoding'][index]))
+        phase = str(keys['phase'][index])
+        processed_results.setdefault(client, {}).setdefault(size, {})[phase] = {
+            'max': cast(stats['max'][index]),
+            'p50': cast(stats['p50'][index]),
+            'p95': cast(stats['p95'][index]),
+            'p99': cast(stats['p99'][index]),
+            'min': cast(stats['min'][index]),
+            'count': int(stats['count'][index]),
+        }
+    return processed_results
+
+
+def size_sort_key(size):
+    label, encoding = split_variant(size)
+    try:
+        return float(label.replace('M', '')), encoding != DEFAULT_ENCODING, encoding
+    except ValueError:
+        return float('inf'), True, encoding
+
+
+def load_images(images):
+    image_json = json.loads(images)
+    el_images = dict(LOCAL_IMAGES)
+    if os.path.exists('images.yaml'):
+        with open('images.yaml', 'r') as f:
+            el_images.update(yaml.safe_load(f)["images"])
+    return image_json, el_images
+
+
+def image_for(client, image_json, el_images):
+    image_to_print = image_json.get(client, 'default')
+    if image_to_print == 'default':
+        image_to_print = el_images.get(client.split("_")[0], 'default')
+    return image_to_print
+
+
+def scaling_results(table, metric, extrapolate_sizes):
+    # Fits every model per client and phase with x = genesis size in MB over all successful runs
+    rows = select_rows(table, (table['metric'] == metric) & (table['value'] > 0) & np.isfinite(table['genesis_bytes']))
+    formatter = METRICS[metric]['formatter']
+    results = {}
+    fitted = {}
+    for client in np.unique(rows['client']):
+        client_rows = select_rows(rows, rows['client'] == client)
+        for phase, encoding in sorted(set(zip(client_rows['phase'], client_rows['encoding']))):
+            group = select_rows(client_rows, (client_rows['phase'] == phase) & (client_rows['encoding'] == encoding))
+            phase = variant_key(str(phase), str(encoding))
+            x = group['genesis_bytes'] / BYTES_PER_MB
+            scaling = fit_scaling(x, group['value'])
+            if scaling is None:
+                continue
+            best = scaling['fits'][scaling['best']]
+            extrapolation = {}
+            if extrapolate_sizes:
+                center, lower, upper = predict(best, extrapolate_sizes)
+                for size, value, low, high in zip(extrapolate_sizes, center, lower, upper):
+                    extrapolation[f'{size:g}M'] = {
+                        'value': float(value),
+                        'lower': float(low),
+                        'upper': float(high),
+                        'readable': f'{formatter(float(value))} [{formatter(max(float(low), 0))} - {formatter(float(high))}]',
+                    }
+            results.setdefault(str(client), {})[str(phase)] = {
+                'best': scaling['best'],
+                'models': {name: public_fit(fit) for name, fit in scaling['fits'].items()},
+                'extrapolation': extrapolation,
+            }
+            fitted[(str(client), str(phase))] = (x, group['value'], best)
+    return results, fitted
+
+
+def plot_scaling(fitted, results_path, metric, extrapolate_sizes):
+    try:
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+    except ImportError:
+        print("matplotlib is not installed, skipping scaling plots")
+        return []
+
+    report_path = os.path.join(results_path, 'reports')
+    plots = []
+    # Encodings of the same phase share a plot so their curves can be compared directly
+    for phase in sorted({split_variant(phase)[0] for _, phase in fitted}):
+        figure, axis = plt.subplots(figsize=(9, 6))
+        for (client, client_phase), (x, y, best) in sorted(fitted.items()):
+            base_phase, encoding = split_variant(client_phase)
+            if base_phase != phase:
+                continue
+            label = client if encoding == DEFAULT_ENCODING else f'{client} {encoding}'
+            points = axis.scatter(x, y, s=12, label=f'{label} ({best["model"]})')
+            upper_size = max([float(np.max(x))] + list(extrapolate_sizes))
+            curve_x = np.linspace(float(np.min(x)), upper_size, 200)
+            center, lower, upper = predict(best, curve_x)
+            axis.plot(curve_x, center, color=points.get_facecolor()[0])
+            axis.fill_between(curve_x, lower, upper, color=points.get_facecolor()[0], alpha=0.15)
+        for size in extrapolate_sizes:
+            axis.axvline(size, color='#999999', linestyle=':', linewidth=1)
+        axis.set_xlabel('Genesis size (MB)')
+        axis.set_ylabel(f'{METRICS[metric]["title"]} ({METRICS[metric]["unit"]}, {phase} start)')
+        axis.legend(fontsize='small')
+        axis.grid(True, alpha=0.3)
+        file_name = f'{metric}_scaling_{phase}.png'
+        figure.savefig(os.path.join(report_path, file_name), dpi=100, bbox_inches='tight')
+        plt.close(figure)
+        plots.append(file_name)
+    return plots
+
+
+def generate_json_report(processed_results, results_path, name):
+    report_path = os.path.join(results_path, 'reports')
+    os.makedirs(report_path, exist_ok=True)
+    with open(os.path.join(report_path, f'{name}.json'), 'w') as json_file:
+        json.dump(processed_results, json_file, indent=4)
+
+
+def html_header(computer_spec):
+    return ['<!DOCTYPE html>',
+            '<html lang="en">',
+            '<head>',
+            '  <meta charset="UTF-8">',
+            '  <meta name="viewport" content="width=device-width, initial-scale=1.0">',
+            '  <title>Benchmarking Report</title>',
+            '  <style>',
+            '    body { font-family: Arial, sans-serif; }',
+            '    table { border-collapse: collapse; margin-bottom: 20px; }',
+            '    th, td { border: 1px solid #ddd; padding: 8px; text-align: center; }',
+            '    th { background-color: #f2f2f2; }',
+            '  </style>',
+            '</head>',
+            '<body>',
+            '<h2>Benchmarking Report</h2>',
+            f'<h3>Computer Specs</h3><pre>{html.escape(computer_spec)}</pre>']
+
+
+def html_row(cells, tag='td'):
+    return '<tr>' + ''.join(f'<{tag}>{cell}</{tag}>' for cell in cells) + '</tr>'
+
+
+def metric_tables(processed_results, metric, image_json, el_images):
+    formatter = METRICS[metric]['formatter']
+    lines = []
+    for client in sorted(processed_results):
+        sizes = processed_results[client]
+        lines.append(f'<h3>{html.escape(client.capitalize())} - {html.escape(str(image_for(client, image_json, el_images)))}</h3>')
+        lines.append('<table>')
+        lines.append('<thead>')
+        lines.append(html_row(['Genesis File Size', 'Encoding', 'Part', 'Max', 'p50', 'p95', 'p99', 'Min', 'Count'],
+                              tag='th'))
+        lines.append('</thead>')
+        lines.append('<tbody>')
+        for size in sorted(sizes, key=size_sort_key):
+            for part in sorted(sizes[size]):
+                metrics = sizes[size][part]
+                lines.append(html_row(list(split_variant(size)) + [part,
+                                       formatter(metrics['max']),
+                                       formatter(metrics['p50']),
+                                       formatter(metrics['p95']),
+                                       formatter(metrics['p99']),
+                                       formatter(metrics['min']),
+                                       metrics['count']]))
+        lines.append('</tbody>')
+        lines.append('</table>')
+    return lines
+
+
+def scaling_tables(scaling, plots, extrapolate_sizes):
+    lines = ['<h2>Scaling</h2>']
+    if not scaling:
+        lines.append('<p>Not enough distinct genesis sizes to fit scaling models.</p>')
+        return lines
+    size_labels = [f'{size:g}M' for size in extrapolate_sizes]
+    lines.append('<table>')
+    lines.append('<thead>')
+    lines.append(html_row(['Client', 'Part', 'Encoding', 'Best Model', 'Parameters', 'RMSE', 'R²']
+                          + [f'Predicted {label} (95%)' for label in size_labels], tag='th'))
+    lines.append('</thead>')
+    lines.append('<tbody>')
+    for client in sorted(scaling):
+        for phase in sorted(scaling[client]):
+            result = scaling[client][phase]
+            best = result['models'][result['best']]
+            parameters = f'{best["formula"]}, a={best["params"][0]:.4g}, b={best["params"][1]:.4g}'
+            lines.append(html_row([html.escape(client)] + list(split_variant(phase)) + [result['best'], parameters,
+                                   f'{best["rmse"]:.4g}', f'{best["r2"]:.3f}']
+                                  + [result['extrapolation'][label]['readable'] for label in size_labels]))
+    lines.append('</tbody>')
+    lines.append('</table>')
+    for plot in plots:
+        lines.append(f'<img src="{plot}" alt="{plot}">')
+    return lines
+
+
+def write_html_report(lines, results_path, name):
+    lines = lines + ['</body>', '</html>']
+    report_path = os.path.join(results_path, 'reports')
+    os.makedirs(report_path, exist_ok=True)
+    with open(os.path.join(report_path, f'{name}.html'), 'w') as html_file:
+        html_file.write('\n'.join(lines) + '\n')
+
+
+def read_computer_spec(results_path):
+    computer_spec_path = os.path.join(results_path, "computer_specs.txt")
+    if os.path.exists(computer_spec_path):
+        with open(computer_spec_path, 'r') as file:
+            return file.read().strip()
+    return "Not available"
+
+
+def generate_reports(results_path, metrics, images, extrapolate_sizes):
+    os.makedirs(os.path.join(results_path, 'reports'), exist_ok=True)
+    computer_spec = read_computer_spec(results_path)
+    image_json, el_images = load_images(images)
+    table = add_derived_rows(load_table(results_path, ledger_metrics_for(metrics)), metrics)
+    grouped = group_statistics(table)
+    for metric in metrics:
+        processed_results = to_nested_results(grouped, metric)
+        generate_json_report(processed_results, results_path, metric)
+        lines = html_header(computer_spec)
+        lines += metric_tables(processed_results, metric, image_json, el_images)
+
+        for derived in derived_metrics_for([metric]):
+            derived_results = to_nested_results(grouped, derived)
+            generate_json_report(derived_results, results_path, derived)
+            lines.append(f'<h2>{html.escape(METRICS[derived]["title"])}</h2>')
+            lines += metric_tables(derived_results, derived, image_json, el_images)
+
+        scaling, fitted = scaling_results(table, metric, extrapolate_sizes)
+        generate_json_report(scaling, results_path, f'{metric}_scaling')
+        plots = plot_scaling(fitted, results_path, metric, extrapolate_sizes)
+        lines += scaling_tables(scaling, plots, extrapolate_sizes)
+
+        write_html_report(lines, results_path, metric)
+        print(f"Generated {metric} report for {len(processed_results)} clients")
+
+
+def main(default_metrics=None, default_results_path='results'):
+    parser = argparse.ArgumentParser(description='Benchmark report')
+    parser.add_argument('--resultsPath', type=str, help='Path to gather the results', default=default_results_path)
+    parser.add_argument('--metrics', type=str, help='Comma-separated metrics to report',
+                        default=','.join(default_metrics or base_metrics()))
+    parser.add_argument('--images', type=str, help='Image values per each client',
+                        default='{ "nethermind": "default", "besu": "default", "geth": "default", "reth": "default", "erigon": "default" }')
+    parser.add_argument('--extrapolate', type=str, help='Comma-separated genesis sizes in MB to extrapolate to',
+                        default='2000,4000')
+
+    args = parser.parse_args()
+
+    metrics = [metric for metric in args.metrics.split(',') if metric]
+    for metric in metrics:
+        if metric not in METRICS or METRICS[metric]['source'] is not None:
+            parser.error(f"Unknown metric {metric}, registered metrics: {', '.join(base_metrics())}")
+
+    extrapolate_sizes = [float(size) for size in args.extrapolate.split(',') if size]
+    generate_reports(args.resultsPath, metrics, args.images, extrapolate_sizes)
+    print('Done!')
+
+
+if __name__ == '__main__':
+    main()
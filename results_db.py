@@ -0,0 +1,338 @@
+import argparse
+import datetime
+import glob
+import hashlib
+import html
+import json
+import os
+import sqlite3
+import numpy as np
+from genesis_encoding import DEFAULT_ENCODING
+from ledger import LEDGER_FILE
+from report_engine import BYTES_PER_MB, METRICS, group_statistics, size_label_bytes, size_sort_key
+from report_metadata import read_computer_specs
+
+DATA_TYPES = ('speed', 'memory')
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    results_dir TEXT NOT NULL,
+    data_type TEXT NOT NULL,
+    date TEXT NOT NULL,
+    host TEXT NOT NULL,
+    computer_specs TEXT,
+    images TEXT,
+    UNIQUE (results_dir, data_type)
+);
+CREATE TABLE IF NOT EXISTS measurements (
+    id INTEGER PRIMARY KEY,
+    run_id INTEGER NOT NULL REFERENCES runs (id),
+    date TEXT NOT NULL,
+    host TEXT NOT NULL,
+    client TEXT NOT NULL,
+    image TEXT,
+    image_digest TEXT,
+    size TEXT NOT NULL,
+    size_mb REAL,
+    encoding TEXT NOT NULL DEFAULT '{default_encoding}',
+    run INTEGER,
+    phase TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    value REAL NOT NULL,
+    unit TEXT,
+    genesis_bytes INTEGER,
+    accounts INTEGER,
+    lane INTEGER,
+    recorded_at INTEGER
+);
+CREATE TABLE IF NOT EXISTS ingested_files (
+    path TEXT PRIMARY KEY,
+    lines INTEGER NOT NULL,
+    bytes INTEGER,
+    prefix_hash TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_measurements_client ON measurements (client, metric, phase, date);
+CREATE INDEX IF NOT EXISTS idx_measurements_image ON measurements (image, image_digest);
+CREATE INDEX IF NOT EXISTS idx_measurements_size ON measurements (size_mb);
+CREATE INDEX IF NOT EXISTS idx_measurements_host ON measurements (host, date);
+CREATE INDEX IF NOT EXISTS idx_measurements_date ON measurements (date);
+'''.format(default_encoding=DEFAULT_ENCODING)
+
+
+def connect(db_path):
+    connection = sqlite3.connect(db_path)
+    connection.executescript(SCHEMA)
+    # Databases created before genesis encodings were recorded
+    columns = [row[1] for row in connection.execute('PRAGMA table_info(measurements)')]
+    if 'encoding' not in columns:
+        connection.execute(f"ALTER TABLE measurements ADD COLUMN encoding TEXT NOT NULL DEFAULT '{DEFAULT_ENCODING}'")
+    # Databases created before ingested ledgers were fingerprinted, their ledgers are ingested again in full
+    columns = [row[1] for row in connection.execute('PRAGMA table_info(ingested_files)')]
+    if 'prefix_hash' not in columns:
+        connection.execute('ALTER TABLE ingested_files ADD COLUMN bytes INTEGER')
+        connection.execute('ALTER TABLE ingested_files ADD COLUMN prefix_hash TEXT')
+    return connection
+
+
+def date_from_dir(results_dir):
+    name = os.path.basename(os.path.normpath(results_dir))
+    if name.startswith('results-'):
+        return name[len('results-'):]
+    return datetime.date.today().strftime('%Y%m%d')
+
+
+def size_to_mb(size):
+    value = size_label_bytes(size)
+    return None if np.isnan(value) else value / BYTES_PER_MB
+
+
+def load_run_metadata(data_path):
+    computer_specs = {}
+    images = None
+    metadata_path = os.path.join(data_path, 'reports', 'metadata.json')
+    if os.path.exists(metadata_path):
+        with open(metadata_path, 'r') as file:
+            metadata = json.load(file)
+        computer_specs = metadata.get('computer_specs', {})
+        images = metadata.get('images')
+    elif os.path.exists(os.path.join(data_path, 'computer_specs.txt')):
+        computer_specs = read_computer_specs(os.path.join(data_path, 'computer_specs.txt'))
+    return computer_specs, images
+
+
+def get_run_id(connection, results_dir, data_type, data_path):
+    row = connection.execute('SELECT id, date, host FROM runs WHERE results_dir = ? AND data_type = ?',
+                             (results_dir, data_type)).fetchone()
+    if row is not None:
+        return row
+    computer_specs, images = load_run_metadata(data_path)
+    date = date_from_dir(results_dir)
+    host = computer_specs.get('Hostname') or computer_specs.get('CPU') or 'unknown'
+    cursor = connection.execute(
+        'INSERT INTO runs (results_dir, data_type, date, host, computer_specs, images) VALUES (?, ?, ?, ?, ?, ?)',
+        (results_dir, data_type, date, host, json.dumps(computer_specs), json.dumps(images)))
+    return cursor.lastrowid, date, host
+
+
+def ingest_ledger(connection, results_dir, data_type):
+    data_path = os.path.join(results_dir, data_type)
+    ledger_path = os.path.abspath(os.path.join(data_path, LEDGER_FILE))
+    if not os.path.exists(ledger_path):
+        return 0
+    if os.path.exists(os.path.join(data_path, 'hosts.json')):
+        # Output of merge_result.py --hosts, its records are already ingested from the host directories
+        print(f"Skipping merged results in {data_path}")
+        return 0
+    run_id, date, host = get_run_id(connection, os.path.abspath(results_dir), data_type, data_path)
+    with open(ledger_path, 'rb') as file:
+        data = file.read()
+    # A partially written last line is left for the next ingest
+    data = data[:data.rfind(b'\n') + 1]
+    row = connection.execute('SELECT lines, bytes, prefix_hash FROM ingested_files WHERE path = ?',
+                             (ledger_path,)).fetchone()
+    if row and row[2] and len(data) >= row[1] and hashlib.sha256(data[:row[1]]).hexdigest() == row[2]:
+        # Unchanged prefix: the ledger was only appended to, so just the bytes after it are new
+        line_count, offset = row[0], row[1]
+    else:
+        if row:
+            # Rewritten or truncated (e.g. by merge_result.py), replace everything ingested from it
+            reason = 'changed since the last ingest' if row[2] else 'was ingested without a fingerprint'
+            print(f"{ledger_path} {reason}, ingesting it again")
+            connection.execute('DELETE FROM measurements WHERE run_id = ?', (run_id,))
+        line_count, offset = 0, 0
+    rows = []
+    for line in data[offset:].decode('utf-8').split('\n')[:-1]:
+        line_count += 1
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            print(f"Skipping invalid ledger line {line_count} in {ledger_path}")
+            continue
+        rows.append((run_id, record.get('date') or date, record.get('host') or host, record['client'], record.get('image'), record.get('image_digest'),
+                     record['size'], size_to_mb(record['size']), record.get('encoding') or DEFAULT_ENCODING,
+                     record.get('run'), record['phase'],
+                     record['metric'], record['value'], record.get('unit'), record.get('genesis_bytes'),
+                     record.get('accounts'), record.get('lane'), record.get('recorded_at')))
+    connection.executemany(
+        'INSERT INTO measurements (run_id, date, host, client, image, image_digest, size, size_mb, encoding, run, '
+        'phase, metric, value, unit, genesis_bytes, accounts, lane, recorded_at) '
+        'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', rows)
+    connection.execute('INSERT OR REPLACE INTO ingested_files (path, lines, bytes, prefix_hash) VALUES (?, ?, ?, ?)',
+                       (ledger_path, line_count, len(data), hashlib.sha256(data).hexdigest()))
+    return len(rows)
+
+
+def ingest(db_path, results_dirs):
+    connection = connect(db_path)
+    total = 0
+    with connection:
+        for results_dir in results_dirs:
+            for data_type in DATA_TYPES:
+                added = ingest_ledger(connection, results_dir, data_type)
+                if added:
+                    print(f"Ingested {added} measurements from {os.path.join(results_dir, data_type)}")
+                total += added
+    connection.close()
+    print(f"Ingested {total} new measurements into {db_path}")
+
+
+def query_trend(connection, metrics, phase, encoding, client=None, host=None):
+    query = ('SELECT metric, client, size, phase, date, value FROM measurements '
+             'WHERE value >= 0 AND phase = ? AND encoding = ? AND metric IN ({})'.format(','.join('?' * len(metrics))))
+    params = [phase, encoding] + list(metrics)
+    if client:
+        query += ' AND client = ?'
+        params.append(client)
+    if host:
+        query += ' AND host = ?'
+        params.append(host)
+    rows = connection.execute(query, params).fetchall()
+    columns = list(zip(*rows)) if rows else [[]] * 6
+    table = {key: np.array(column, dtype=str) for key, column in zip(('metric', 'client', 'size', 'phase', 'date'), columns)}
+    table['value'] = np.array(columns[5], dtype=float)
+    return table
+
+
+def trend_results(table):
+    grouped = group_statistics(table, keys=('metric', 'size', 'client', 'date', 'phase'))
+    keys = grouped['keys']
+    stats = grouped['stats']
+    trend = {}
+    for index in range(len(stats.get('count', []))):
+        metric = str(keys['metric'][index])
+        size = str(keys['size'][index])
+        client = str(keys['client'][index])
+        trend.setdefault(metric, {}).setdefault(size, {}).setdefault(client, []).append({
+            'date': str(keys['date'][index]),
+            'p50': float(stats['p50'][index]),
+            'max': float(stats['max'][index]),
+            'count': int(stats['count'][index]),
+        })
+    return trend
+
+
+def parse_dates(dates):
+    # Dates come from results-<date> directory names, fall back to their sorted order when they are not dates
+    parsed = {}
+    for date in dates:
+        for date_format in ('%Y%m%d', '%Y-%m-%d'):
+            try:
+                parsed[date] = datetime.datetime.strptime(date, date_format)
+                break
+            except ValueError:
+                continue
+        else:
+            return None
+    return parsed
+
+
+def plot_trend(trend, output_path, phase):
+    try:
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+    except ImportError:
+        print("matplotlib is not installed, skipping trend plots")
+        return []
+
+    plots = []
+    for metric, sizes in trend.items():
+        for size in sorted(sizes, key=size_sort_key):
+            figure, axis = plt.subplots(figsize=(9, 5))
+            # One shared x axis for all clients, even when they were not run on the same dates
+            dates = sorted({point['date'] for points in sizes[size].values() for point in points})
+            positions = parse_dates(dates) or {date: index for index, date in enumerate(dates)}
+            for client, points in sorted(sizes[size].items()):
+                points = sorted(points, key=lambda point: positions[point['date']])
+                axis.plot([positions[point['date']] for point in points], [point['p50'] for point in points],
+                          marker='o', label=client)
+            if not isinstance(positions[dates[0]], datetime.datetime):
+                axis.set_xticks(range(len(dates)))
+                axis.set_xticklabels(dates)
+            axis.set_title(f'{METRICS[metric]["title"]} p50 - {size} genesis, {phase} start')
+            axis.set_xlabel('Date')
+            axis.set_ylabel(f'{METRICS[metric]["title"]} ({METRICS[metric]["unit"]})')
+            axis.legend(fontsize='small')
+            axis.grid(True, alpha=0.3)
+            figure.autofmt_xdate()
+            file_name = f'trend_{metric}_{size}_{phase}.png'
+            figure.savefig(os.path.join(output_path, file_name), dpi=100, bbox_inches='tight')
+            plt.close(figure)
+            plots.append(file_name)
+    return plots
+
+
+def write_trend_html(trend, plots, output_path, phase):
+    lines = ['<!DOCTYPE html>', '<html lang="en">', '<head>', '  <meta charset="UTF-8">',
+             '  <title>Benchmark Trends</title>',
+             '  <style>',
+             '    body { font-family: Arial, sans-serif; }',
+             '    table { border-collapse: collapse; margin-bottom: 20px; }',
+             '    th, td { border: 1px solid #ddd; padding: 8px; text-align: center; }',
+             '    th { background-color: #f2f2f2; }',
+             '  </style>',
+             '</head>', '<body>', f'<h2>Benchmark Trends ({phase} start)</h2>']
+    for metric, sizes in trend.items():
+        formatter = METRICS[metric]['formatter']
+        lines.append(f'<h3>{html.escape(METRICS[metric]["title"])}</h3>')
+        for size in sorted(sizes, key=size_sort_key):
+            dates = sorted({point['date'] for points in sizes[size].values() for point in points})
+            lines.append(f'<h4>{size}</h4>')
+            lines.append('<table>')
+            lines.append('<tr><th>Client</th>' + ''.join(f'<th>{date}</th>' for date in dates) + '</tr>')
+            for client, points in sorted(sizes[size].items()):
+                by_date = {point['date']: point for point in points}
+                cells = [formatter(by_date[date]['p50']) if date in by_date else '' for date in dates]
+                lines.append(f'<tr><td>{html.escape(client)}</td>' + ''.join(f'<td>{cell}</td>' for cell in cells) + '</tr>')
+            lines.append('</table>')
+    for plot in plots:
+        lines.append(f'<img src="{plot}" alt="{plot}">')
+    lines += ['</body>', '</html>']
+    with open(os.path.join(output_path, 'trend.html'), 'w') as html_file:
+        html_file.write('\n'.join(lines) + '\n')
+
+
+def trend(db_path, output_path, metrics, phase, encoding, client, host):
+    connection = connect(db_path)
+    table = query_trend(connection, metrics, phase, encoding, client, host)
+    connection.close()
+    results = trend_results(table)
+    os.makedirs(output_path, exist_ok=True)
+    with open(os.path.join(output_path, 'trend.json'), 'w') as json_file:
+        json.dump(results, json_file, indent=4)
+    plots = plot_trend(results, output_path, phase)
+    write_trend_html(results, plots, output_path, phase)
+    print(f"Trend report saved to {output_path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Historical results database')
+    parser.add_argument('--db', type=str, help='SQLite database file', default='results.db')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    ingest_parser = subparsers.add_parser('ingest', help='Ingest results-<date> directories incrementally.')
+    ingest_parser.add_argument('results_dirs', nargs='*', help='Directories to ingest, defaults to ./results-*')
+
+    trend_parser = subparsers.add_parser('trend', help='Write a trend report of init time and peak memory.')
+    trend_parser.add_argument('--output', type=str, help='Where to write the trend report', default='results/trend')
+    trend_parser.add_argument('--metrics', type=str, help='Comma-separated metrics', default=','.join(DATA_TYPES))
+    trend_parser.add_argument('--phase', type=str, help='first or second start', default='first')
+    trend_parser.add_argument('--encoding', type=str, help='Genesis encoding to follow', default=DEFAULT_ENCODING)
+    trend_parser.add_argument('--client', type=str, help='Only include this client')
+    trend_parser.add_argument('--host', type=str, help='Only include this host')
+
+    args = parser.parse_args()
+
+    if args.command == 'ingest':
+        results_dirs = args.results_dirs or sorted(glob.glob('results-*'))
+        ingest(args.db, results_dirs)
+    elif args.command == 'trend':
+        metrics = [metric for metric in args.metrics.split(',') if metric]
+        trend(args.db, args.output, metrics, args.phase, args.encoding, args.client, args.host)
+
+
+if __name__ == '__main__':
+    main()
@@ -6,8 +6,11 @@ RUNS=8
 IMAGES="default"
 OUTPUT_DIR="results/memory"
 SIZES=("1" "64" "512")
+LANES=1
+LANE_MEMORY=""
+ENCODINGS=("indent-random-hex")
 
-while getopts "t:c:r:i:o:s:" opt; do
+while getopts "t:c:r:i:o:s:l:m:e:" opt; do
   case $opt in
     t) TEST_PATH="$OPTARG" ;;
     c) CLIENTS="$OPTARG" ;;
@@ -15,11 +18,20 @@ while getopts "t:c:r:i:o:s:" opt; do
     i) IMAGES="$OPTARG" ;;
     o) OUTPUT_DIR="$OPTARG" ;;
     s) IFS=',' read -ra SIZES <<< "$OPTARG" ;; 
-    *) echo "Usage: $0 [-t test_path] [-c clients] [-r runs] [-i images] [-o output_dir] [-s sizes]" >&2
+    l) LANES="$OPTARG" ;;
+    m) LANE_MEMORY="$OPTARG" ;;
+    e) IFS=',' read -ra ENCODINGS <<< "$OPTARG" ;;
+    *) echo "Usage: $0 [-t test_path] [-c clients] [-r runs] [-i images] [-o output_dir] [-s sizes] [-l lanes] [-m lane_memory] [-e encodings]" >&2
        exit 1 ;;
   esac
 done
 
+if [ "$LANES" -gt 1 ] && [ "$(nproc)" -lt "$LANES" ]; then
+  # Every lane needs at least one CPU of its own, otherwise the lanes would run unpinned
+  echo "[ERROR] $LANES lanes need at least $LANES CPUs, this host has $(nproc)" >&2
+  exit 1
+fi
+
 IFS=',' read -ra CLIENT_ARRAY <<< "$CLIENTS"
 IFS=',' read -ra IMAGE_ARRAY <<< "$IMAGES"
 
@@ -33,10 +45,45 @@ apt install -y jq
 python3 computer_specs.py --output_folder "$OUTPUT_DIR"
 echo "Dependencies installed."
 
+lane_suffix() {
+  local lane=$1
+  if [ "$lane" -eq 0 ]; then
+    echo ""
+  else
+    echo "-lane$lane"
+  fi
+}
+
+lane_cpuset() {
+  local lane=$1
+  if [ "$LANES" -le 1 ]; then
+    echo ""
+    return
+  fi
+  local cpus_per_lane=$(( $(nproc) / LANES ))
+  local first_cpu=$(( lane * cpus_per_lane ))
+  echo "$first_cpu-$(( first_cpu + cpus_per_lane - 1 ))"
+}
+
+lane_compose() {
+  # Runs docker compose with the lane's env file, so names, data dir and network resolve to that lane
+  local lane=$1
+  shift
+  local env_file=".env$(lane_suffix $lane)"
+  if [ ! -f "$env_file" ]; then
+    # setup_node.py writes the env file before the lane's first start, so there is nothing to stop yet
+    return 0
+  fi
+  docker compose --env-file "$env_file" "$@"
+}
+
 check_initialization_completed() {
   local client=$1
   local log_entry=$2
-  local container_name="gas-execution-client"
+  local lane=$3
+  local suffix=$(lane_suffix $lane)
+  local container_name="gas-execution-client$suffix"
+  local container_filter="^gas-execution-client(-sync)?$suffix\$"
   local container_wait_time=1 
   local container_check_retries=60
   local log_wait_time=0.5 
@@ -46,7 +93,7 @@ check_initialization_completed() {
 
   check_container_running() {
     while [ $container_retry_count -lt $container_check_retries ]; do
-      if [ -z "$(docker ps -q -f name=$container_name)" ]; then
+      if [ -z "$(docker ps -q -f name=$container_filter)" ]; then
         container_retry_count=$((container_retry_count + 1))
         sleep $container_wait_time
       else
@@ -152,122 +199,272 @@ monitor_memory_usage() {
     sleep $interval
   done &
   monitor_pid=$!
-  trap "kill $monitor_pid" EXIT
-  echo "[INFO] Memory monitoring for $container_name with PID $monitor_pid started."
+
+  # cgroup memory.stat sampler: composition over time and at the peak
+  rm -f "${output_file%.txt}.stat.jsonl" "${output_file%.txt}.summary.json"
+  python3 memory_sampler.py --container $container_name \
+    --samples "${output_file%.txt}.stat.jsonl" --summary "${output_file%.txt}.summary.json" --interval $interval &
+  sampler_pid=$!
+  trap "kill $monitor_pid $sampler_pid" EXIT
+  echo "[INFO] Memory monitoring for $container_name with PID $monitor_pid (cgroup sampler $sampler_pid) started."
 }
 
 stop_memory_monitor() {
-  kill $monitor_pid
+  kill $monitor_pid $sampler_pid
   wait $monitor_pid 2>/dev/null
+  wait $sampler_pid 2>/dev/null
 }
 
 clean_up() {
+  local suffix=$(lane_suffix $1)
   echo "[INFO] Cleaning up containers and data..."
-  docker stop gas-execution-client gas-execution-client-sync
-  docker rm gas-execution-client gas-execution-client-sync
-  docker container prune -f
-  sudo rm -rf execution-data
+  docker stop gas-execution-client$suffix gas-execution-client-sync$suffix
+  docker rm gas-execution-client$suffix gas-execution-client-sync$suffix
+  docker container prune -f --filter "label=com.docker.compose.project=$COMPOSE_PROJECT_NAME"
+  sudo rm -rf execution-data$suffix
   echo "[INFO] Cleanup completed."
 }
 
-for size in "${SIZES[@]}"; do
+use_encoding() {
+  # With several encodings the generators write <name>.<encoding>.json, the client scripts read <name>.json
+  if [ ${#ENCODINGS[@]} -le 1 ]; then
+    return
+  fi
+  echo "[INFO] Using genesis encoding $1"
+  for name in chainspec genesis besu; do
+    ln -f "$TEST_PATH/tmp/$name.$1.json" "$TEST_PATH/tmp/$name.json"
+    ln -f "$TEST_PATH/tmp/$name.$1.json.meta.json" "$TEST_PATH/tmp/$name.json.meta.json"
+  done
+}
 
-  echo "[INFO] Calculating new size for $size"
-  new_size=$(echo "scale=2; ($size / 1.2 + 0.5)/1" | bc)
+genesis_file_for() {
+  case $1 in
+    nethermind) echo "$TEST_PATH/tmp/chainspec.json" ;;
+    besu) echo "$TEST_PATH/tmp/besu.json" ;;
+    *) echo "$TEST_PATH/tmp/genesis.json" ;;
+  esac
+}
+
+record_result() {
+  local client=$1
+  local run=$2
+  local part=$3
+  local size=$4
+  local lane=$5
+  local cpuset=$6
+  local start_time=$7
+  local end_time=$8
+  local memory_output_file=$9
+  local monitored_container=${10}
+  local container_name="gas-execution-client$(lane_suffix $lane)"
+  local image_name=$(docker inspect --format '{{.Config.Image}}' $container_name 2>/dev/null)
+  local image_digest=$(docker inspect --format '{{.Image}}' $container_name 2>/dev/null)
+  local genesis_meta="$(genesis_file_for ${client%%_*}).meta.json"
+  local genesis_bytes=$(jq -r '.bytes // empty' "$genesis_meta" 2>/dev/null)
+  local accounts=$(jq -r '.accounts // empty' "$genesis_meta" 2>/dev/null)
+  local genesis_encoding=$(jq -r '.encoding // empty' "$genesis_meta" 2>/dev/null)
+  local value=$(cat "$memory_output_file" 2>/dev/null || echo -1)
+  # Sample files are referenced relative to the ledger, so they survive copying or renaming the results directory
+  local sample_name="samples/$(basename "${memory_output_file%.txt}")"
+  local sampler="{\"type\": \"docker-stats\", \"container\": \"$monitored_container\", \"interval_s\": 1, \"file\": \"$sample_name.txt\""
+  if [ "${client%%_*}" == "mock" ]; then
+    # The mock logs its own peak RSS, calibration.py compares it with the docker stats peak
+    local client_peak_rss_mb=$(docker logs $container_name 2>&1 | grep "peak_rss_mb=" | tail -1 | sed -n 's/.*peak_rss_mb=\([0-9]*\).*/\1/p')
+    if [ -n "$client_peak_rss_mb" ]; then
+      sampler="$sampler, \"client_peak_rss_mb\": $client_peak_rss_mb"
+    fi
+  fi
+  python3 ledger.py append --ledger "$LEDGER_FILE" \
+    --client $client --image "$image_name" --image-digest "$image_digest" \
+    --size "${size}M" --run $run --phase $part --metric memory --value $value --unit MB \
+    --genesis-bytes "$genesis_bytes" --accounts "$accounts" --encoding "$genesis_encoding" \
+    --lane $lane --cpuset "$cpuset" --start-ms $start_time --end-ms $end_time \
+    --sampler "$sampler}"
+
+  # Peak anon memory plus the anon/file/kernel/shmem split at the moment of the total peak
+  local summary_file="${memory_output_file%.txt}.summary.json"
+  if ! jq -e '.samples > 0 and .at_peak != null' "$summary_file" >/dev/null 2>&1; then
+    # No cgroup was sampled (e.g. rootless docker), missing data must not look like a failed run
+    echo "[WARN] No cgroup memory samples for $monitored_container, skipping memory composition records"
+    return
+  fi
+  for component in anon file kernel shmem; do
+    if [ "$component" == "anon" ]; then
+      component_value=$(jq -r '.peak_anon_mb // -1' "$summary_file" 2>/dev/null || echo -1)
+    else
+      component_value=$(jq -r ".at_peak.$component // -1" "$summary_file" 2>/dev/null || echo -1)
+    fi
+    python3 ledger.py append --ledger "$LEDGER_FILE" \
+      --client $client --image "$image_name" --image-digest "$image_digest" \
+      --size "${size}M" --run $run --phase $part --metric memory_$component --value ${component_value:--1} --unit MB \
+      --genesis-bytes "$genesis_bytes" --accounts "$accounts" --encoding "$genesis_encoding" \
+      --lane $lane --cpuset "$cpuset" --start-ms $start_time --end-ms $end_time \
+      --sampler "{\"type\": \"cgroup-memory-stat\", \"container\": \"$monitored_container\", \"interval_s\": 1, \"file\": \"$sample_name.stat.jsonl\", \"summary\": \"$sample_name.summary.json\"}"
+  done
+}
+
+next_job() {
+  (
+    flock -x 200
+    local job=$(cat "$JOB_COUNTER")
+    echo $((job + 1)) > "$JOB_COUNTER"
+    echo $job
+  ) 200>"$JOB_COUNTER.lock"
+}
+
+run_job() {
+  local run=$1
+  local I=$2
+  local size=$3
+  local lane=$4
+  local suffix=$(lane_suffix $lane)
+  local cpuset=$(lane_cpuset $lane)
+  local client="${CLIENT_ARRAY[$I]}"
+  # Tagged clients such as geth_new run the scripts of their base client, like setup_node.py
+  local client_base="${client%%_*}"
+  local image="${IMAGE_ARRAY[$I]}"
+  local lane_args="--lane $lane --cpuset=$cpuset --mem-limit=$LANE_MEMORY"
+  export COMPOSE_PROJECT_NAME="$client_base$suffix"
+
+  echo "--------------------------------------"
+  echo "[INFO] Run size ${size}M round $run - Client $client - Image $image - Lane $lane"
+  echo "--------------------------------------"
+
+  case $client_base in
+    nethermind) log_entry="initialization completed" ;;
+    reth) log_entry="Starting reth" ;;
+    erigon) log_entry="logging to file system" ;;
+    geth) log_entry="Set global gas cap" ;;
+    besu) log_entry="Writing node record to disk" ;;
+    mock) log_entry="Mock client ready" ;;
+  esac
+
+  cd "scripts/$client_base"
+  lane_compose $lane down --remove-orphans
+  clean_up $lane
+  cd ../..
+
+  memory_output_file="${SAMPLES_DIR}/${client}_${run}_first_${size}M_${encoding}.txt"
+  start_time=$(($(date +%s%N) / 1000000))
+  if [[ "$client_base" == "nethermind" || "$client_base" == "besu" || "$client_base" == "mock" ]]; then
+    monitored_container="gas-execution-client$suffix"
+  else
+    monitored_container="gas-execution-client-sync$suffix"
+  fi
+  monitor_memory_usage $monitored_container $memory_output_file
+
+  if [ -z "$image" ]; then
+    echo "[INFO] Image input is empty, using default image."
+    python3 setup_node.py --client $client $lane_args
+  else
+    echo "[INFO] Using provided image: $image for $client"
+    python3 setup_node.py --client $client --image $image $lane_args
+  fi
+
+  echo "[DEBUG] First start sleeping for 10 seconds..."
+  sleep 10
+  check_initialization_completed $client "$log_entry" $lane
   if [ $? -ne 0 ]; then
-    echo "[ERROR] Error calculating new size with bc"
-    exit 1
+    stop_memory_monitor
+    echo "[ERROR] Initialization check failed for client $client"
+    echo "-1" > "$memory_output_file"
+    record_result $client $run first $size $lane "$cpuset" $start_time $(($(date +%s%N) / 1000000)) $memory_output_file $monitored_container
+    return
+  fi
+  stop_memory_monitor
+  record_result $client $run first $size $lane "$cpuset" $start_time $(($(date +%s%N) / 1000000)) $memory_output_file $monitored_container
+
+  cd "scripts/$client_base"
+  lane_compose $lane stop
+  clean_up $lane
+  cd ../..
+
+  memory_output_file="${SAMPLES_DIR}/${client}_${run}_second_${size}M_${encoding}.txt"
+  start_time=$(($(date +%s%N) / 1000000))
+  monitored_container="gas-execution-client$suffix"
+  monitor_memory_usage $monitored_container $memory_output_file
+
+  if [ -z "$image" ]; then
+    echo "[INFO] Image input is empty, using default image."
+    python3 setup_node.py --client $client --second-start $lane_args
+  else
+    echo "[INFO] Using provided image: $image for $client"
+    python3 setup_node.py --client $client --image $image --second-start $lane_args
   fi
-  echo "[INFO] New size calculated: $new_size"
 
-  python3 generate_chainspec.py $TEST_PATH/chainspec.json $TEST_PATH/tmp/chainspec.json $new_size
-  python3 generate_genesis.py $TEST_PATH/genesis.json $TEST_PATH/tmp/genesis.json $new_size
-  python3 generate_besu.py $TEST_PATH/besu.json $TEST_PATH/tmp/besu.json $new_size
-
-  clean_up
-
-  for run in $(seq 1 $RUNS); do
-    for I in "${!CLIENT_ARRAY[@]}"; do
-      echo "--------------------------------------"
-      echo "[INFO] Run size ${size}M round $run - Client ${CLIENT_ARRAY[$I]} - Image ${IMAGE_ARRAY[$I]}"
-      echo "--------------------------------------"
-
-      client="${CLIENT_ARRAY[$I]}"
-      image="${IMAGE_ARRAY[$I]}"
-
-      case $client in
-        nethermind) log_entry="initialization completed" ;;
-        reth) log_entry="Starting reth" ;;
-        erigon) log_entry="logging to file system" ;;
-        geth) log_entry="Set global gas cap" ;;
-        besu) log_entry="Writing node record to disk" ;;
-      esac
-
-      cd "scripts/$client"
-      docker compose down --remove-orphans
-      clean_up
-      cd ../..
-
-      memory_output_file="${OUTPUT_DIR}/${client}_${run}_first_${size}M.txt"
-      if [[ "$client" == "nethermind" || "$client" == "besu" ]]; then
-        monitor_memory_usage "gas-execution-client" $memory_output_file
-      else
-        monitor_memory_usage "gas-execution-client-sync" $memory_output_file
-      fi
+  echo "[DEBUG] Second start sleeping for 10 seconds..."
+  sleep 10
+  check_initialization_completed $client "$log_entry" $lane
+  if [ $? -ne 0 ]; then
+    stop_memory_monitor
+    echo "[ERROR] Initialization check failed for client $client"
+    echo "-1" > "$memory_output_file"
+    record_result $client $run second $size $lane "$cpuset" $start_time $(($(date +%s%N) / 1000000)) $memory_output_file $monitored_container
+    return
+  fi
+  stop_memory_monitor
+  record_result $client $run second $size $lane "$cpuset" $start_time $(($(date +%s%N) / 1000000)) $memory_output_file $monitored_container
 
-      if [ -z "$image" ]; then
-        echo "[INFO] Image input is empty, using default image."
-        python3 setup_node.py --client $client
-      else
-        echo "[INFO] Using provided image: $image for $client"
-        python3 setup_node.py --client $client --image $image
-      fi
+  cd "scripts/$client_base"
+  lane_compose $lane down --remove-orphans
+  clean_up $lane
+  cd ../..
+}
 
-      echo "[DEBUG] First start sleeping for 10 seconds..."
-      sleep 10
-      check_initialization_completed $client "$log_entry"
-      if [ $? -ne 0 ]; then
-        stop_memory_monitor
-        echo "[ERROR] Initialization check failed for client $client"
-        echo "-1" > "$memory_output_file"
-        continue
-      fi
-      stop_memory_monitor
+lane_worker() {
+  local lane=$1
+  while true; do
+    job=$(next_job)
+    if [ $job -ge ${#JOBS[@]} ]; then
+      break
+    fi
+    IFS=':' read -r run I <<< "${JOBS[$job]}"
+    run_job $run $I $size $lane
+  done
+}
 
-      cd "scripts/$client"
-      docker compose stop
-      clean_up
-      cd ../..
+LEDGER_FILE="${OUTPUT_DIR}/ledger.jsonl"
+SAMPLES_DIR="${OUTPUT_DIR}/samples"
+mkdir -p "$SAMPLES_DIR"
+JOB_COUNTER="$TEST_PATH/tmp/job_counter"
 
-      memory_output_file="${OUTPUT_DIR}/${client}_${run}_second_${size}M.txt"
-      monitor_memory_usage "gas-execution-client" $memory_output_file
+# Jobs keep the serial order (runs outer, clients inner) so a single lane behaves as before
+JOBS=()
+for run in $(seq 1 $RUNS); do
+  for I in "${!CLIENT_ARRAY[@]}"; do
+    JOBS+=("$run:$I")
+  done
+done
 
-      if [ -z "$image" ]; then
-        echo "[INFO] Image input is empty, using default image."
-        python3 setup_node.py --client $client --second-start
-      else
-        echo "[INFO] Using provided image: $image for $client"
-        python3 setup_node.py --client $client --image $image --second-start
-      fi
+for size in "${SIZES[@]}"; do
+  echo "[INFO] Calculating new size for $size"
+  new_size=$(echo "scale=2; ($size / 1.2 + 0.5)/1" | bc)
+  if [ $? -ne 0 ]; then
+    echo "[ERROR] Error calculating new size with bc"
+    exit 1
+  fi
+  echo "[INFO] New size calculated: $new_size"
 
-      echo "[DEBUG] Second start sleeping for 10 seconds..."
-      sleep 10
-      check_initialization_completed $client "$log_entry"
-      if [ $? -ne 0 ]; then
-        stop_memory_monitor
-        echo "[ERROR] Initialization check failed for client $client"
-        echo "-1" > "$memory_output_file"
-        continue
-      fi
-      stop_memory_monitor
+  # Each generator writes every encoding from one account set, so only the JSON representation differs
+  encodings=$(IFS=','; echo "${ENCODINGS[*]}")
+  echo "[INFO] Generating ${size}M genesis files with encodings $encodings"
+  python3 generate_chainspec.py $TEST_PATH/chainspec.json $TEST_PATH/tmp/chainspec.json $new_size $encodings
+  python3 generate_genesis.py $TEST_PATH/genesis.json $TEST_PATH/tmp/genesis.json $new_size $encodings
+  python3 generate_besu.py $TEST_PATH/besu.json $TEST_PATH/tmp/besu.json $new_size $encodings
+
+  for encoding in "${ENCODINGS[@]}"; do
+    use_encoding $encoding
 
-      cd "scripts/$client"
-      docker compose down --remove-orphans
-      clean_up
-      cd ../..
+    echo 0 > "$JOB_COUNTER"
+    for lane in $(seq 0 $((LANES - 1))); do
+      lane_worker $lane &
     done
+    wait
   done
 done
 
 python3 report_memory.py --resultsPath $OUTPUT_DIR
+if [[ " ${CLIENT_ARRAY[*]} " == *" mock "* ]]; then
+  python3 calibration.py --resultsPath $OUTPUT_DIR
+fi
 echo "[INFO] Benchmarking completed and report generated."
\ No newline at end of file
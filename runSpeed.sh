@@ -6,8 +6,11 @@ RUNS=8
 IMAGES="default"
 OUTPUT_DIR="results/speed"
 SIZES=("1" "64" "512")
+LANES=1
+LANE_MEMORY=""
+ENCODINGS=("indent-random-hex")
 
-while getopts "t:c:r:i:o:s:" opt; do
+while getopts "t:c:r:i:o:s:l:m:e:" opt; do
   case $opt in
     t) TEST_PATH="$OPTARG" ;;
     c) CLIENTS="$OPTARG" ;;
@@ -15,11 +18,20 @@ while getopts "t:c:r:i:o:s:" opt; do
     i) IMAGES="$OPTARG" ;;
     o) OUTPUT_DIR="$OPTARG" ;;
     s) IFS=',' read -ra SIZES <<< "$OPTARG" ;; 
-    *) echo "Usage: $0 [-t test_path] [-c clients] [-r runs] [-i images] [-o output_dir] [-s sizes]" >&2
+    l) LANES="$OPTARG" ;;
+    m) LANE_MEMORY="$OPTARG" ;;
+    e) IFS=',' read -ra ENCODINGS <<< "$OPTARG" ;;
+    *) echo "Usage: $0 [-t test_path] [-c clients] [-r runs] [-i images] [-o output_dir] [-s sizes] [-l lanes] [-m lane_memory] [-e encodings]" >&2
        exit 1 ;;
   esac
 done
 
+if [ "$LANES" -gt 1 ] && [ "$(nproc)" -lt "$LANES" ]; then
+  # Every lane needs at least one CPU of its own, otherwise the lanes would run unpinned
+  echo "[ERROR] $LANES lanes need at least $LANES CPUs, this host has $(nproc)" >&2
+  exit 1
+fi
+
 IFS=',' read -ra CLIENT_ARRAY <<< "$CLIENTS"
 IFS=',' read -ra IMAGE_ARRAY <<< "$IMAGES"
 
@@ -33,10 +45,45 @@ apt install -y jq
 python3 computer_specs.py --output_folder "$OUTPUT_DIR"
 echo "Dependencies installed."
 
+lane_suffix() {
+  local lane=$1
+  if [ "$lane" -eq 0 ]; then
+    echo ""
+  else
+    echo "-lane$lane"
+  fi
+}
+
+lane_cpuset() {
+  local lane=$1
+  if [ "$LANES" -le 1 ]; then
+    echo ""
+    return
+  fi
+  local cpus_per_lane=$(( $(nproc) / LANES ))
+  local first_cpu=$(( lane * cpus_per_lane ))
+  echo "$first_cpu-$(( first_cpu + cpus_per_lane - 1 ))"
+}
+
+lane_compose() {
+  # Runs docker compose with the lane's env file, so names, data dir and network resolve to that lane
+  local lane=$1
+  shift
+  local env_file=".env$(lane_suffix $lane)"
+  if [ ! -f "$env_file" ]; then
+    # setup_node.py writes the env file before the lane's first start, so there is nothing to stop yet
+    return 0
+  fi
+  docker compose --env-file "$env_file" "$@"
+}
+
 check_initialization_completed() {
   local client=$1
   local log_entry=$2
-  local container_name="gas-execution-client"
+  local lane=$3
+  local suffix=$(lane_suffix $lane)
+  local container_name="gas-execution-client$suffix"
+  local container_filter="^gas-execution-client(-sync)?$suffix\$"
   local container_wait_time=1 
   local container_check_retries=60
   local log_wait_time=0.5 
@@ -46,7 +93,7 @@ check_initialization_completed() {
 
   check_container_running() {
     while [ $container_retry_count -lt $container_check_retries ]; do
-      if [ -z "$(docker ps -q -f name=$container_name)" ]; then
+      if [ -z "$(docker ps -q -f name=$container_filter)" ]; then
         container_retry_count=$((container_retry_count + 1))
         sleep $container_wait_time
       else
@@ -86,111 +133,216 @@ check_initialization_completed() {
 }
 
 clean_up() {
+  local suffix=$(lane_suffix $1)
   echo "[INFO] Cleaning up containers and data..."
-  docker stop gas-execution-client gas-execution-client-sync
-  docker rm gas-execution-client gas-execution-client-sync
-  docker container prune -f
-  sudo rm -rf execution-data
+  docker stop gas-execution-client$suffix gas-execution-client-sync$suffix
+  docker rm gas-execution-client$suffix gas-execution-client-sync$suffix
+  docker container prune -f --filter "label=com.docker.compose.project=$COMPOSE_PROJECT_NAME"
+  sudo rm -rf execution-data$suffix
   echo "[INFO] Cleanup completed."
 }
 
-for size in "${SIZES[@]}"; do
-  echo "[INFO] Calculating new size for $size"
-  new_size=$(echo "scale=2; ($size / 1.2 + 0.5)/1" | bc)
-  if [ $? -ne 0 ]; then
-    echo "[ERROR] Error calculating new size with bc"
-    exit 1
+use_encoding() {
+  # With several encodings the generators write <name>.<encoding>.json, the client scripts read <name>.json
+  if [ ${#ENCODINGS[@]} -le 1 ]; then
+    return
   fi
-  echo "[INFO] New size calculated: $new_size"
+  echo "[INFO] Using genesis encoding $1"
+  for name in chainspec genesis besu; do
+    ln -f "$TEST_PATH/tmp/$name.$1.json" "$TEST_PATH/tmp/$name.json"
+    ln -f "$TEST_PATH/tmp/$name.$1.json.meta.json" "$TEST_PATH/tmp/$name.json.meta.json"
+  done
+}
 
-  python3 generate_chainspec.py $TEST_PATH/chainspec.json $TEST_PATH/tmp/chainspec.json $new_size
-  python3 generate_genesis.py $TEST_PATH/genesis.json $TEST_PATH/tmp/genesis.json $new_size
-  python3 generate_besu.py $TEST_PATH/besu.json $TEST_PATH/tmp/besu.json $new_size
+genesis_file_for() {
+  case $1 in
+    nethermind) echo "$TEST_PATH/tmp/chainspec.json" ;;
+    besu) echo "$TEST_PATH/tmp/besu.json" ;;
+    *) echo "$TEST_PATH/tmp/genesis.json" ;;
+  esac
+}
 
-  clean_up
+record_result() {
+  local client=$1
+  local run=$2
+  local part=$3
+  local size=$4
+  local lane=$5
+  local cpuset=$6
+  local start_time=$7
+  local end_time=$8
+  local value=$9
+  local log_entry=${10}
+  local container_name="gas-execution-client$(lane_suffix $lane)"
+  local image_name=$(docker inspect --format '{{.Config.Image}}' $container_name 2>/dev/null)
+  local image_digest=$(docker inspect --format '{{.Image}}' $container_name 2>/dev/null)
+  local genesis_meta="$(genesis_file_for ${client%%_*}).meta.json"
+  local genesis_bytes=$(jq -r '.bytes // empty' "$genesis_meta" 2>/dev/null)
+  local accounts=$(jq -r '.accounts // empty' "$genesis_meta" 2>/dev/null)
+  local genesis_encoding=$(jq -r '.encoding // empty' "$genesis_meta" 2>/dev/null)
+  local sampler="{\"type\": \"log\", \"container\": \"$container_name\", \"log_entry\": \"$log_entry\""
+  if [ "${client%%_*}" == "mock" ]; then
+    # The mock logs its own startup time, calibration.py compares it with the measured interval
+    local client_startup_ms=$(docker logs $container_name 2>&1 | grep "$log_entry" | tail -1 | sed -n 's/.*startup_ms=\([0-9]*\).*/\1/p')
+    if [ -n "$client_startup_ms" ]; then
+      sampler="$sampler, \"client_startup_ms\": $client_startup_ms"
+    fi
+  fi
+  python3 ledger.py append --ledger "$LEDGER_FILE" \
+    --client $client --image "$image_name" --image-digest "$image_digest" \
+    --size "${size}M" --run $run --phase $part --metric speed --value $value --unit ms \
+    --genesis-bytes "$genesis_bytes" --accounts "$accounts" --encoding "$genesis_encoding" \
+    --lane $lane --cpuset "$cpuset" --start-ms $start_time --end-ms $end_time \
+    --sampler "$sampler}"
+}
 
-  for run in $(seq 1 $RUNS); do
-    for I in "${!CLIENT_ARRAY[@]}"; do
-      echo "--------------------------------------"
-      echo "[INFO] Run size ${size}M round $run - Client ${CLIENT_ARRAY[$I]} - Image ${IMAGE_ARRAY[$I]}"
-      echo "--------------------------------------"
+next_job() {
+  (
+    flock -x 200
+    local job=$(cat "$JOB_COUNTER")
+    echo $((job + 1)) > "$JOB_COUNTER"
+    echo $job
+  ) 200>"$JOB_COUNTER.lock"
+}
 
-      client="${CLIENT_ARRAY[$I]}"
-      image="${IMAGE_ARRAY[$I]}"
+run_job() {
+  local run=$1
+  local I=$2
+  local size=$3
+  local lane=$4
+  local cpuset=$(lane_cpuset $lane)
+  local client="${CLIENT_ARRAY[$I]}"
+  # Tagged clients such as geth_new run the scripts of their base client, like setup_node.py
+  local client_base="${client%%_*}"
+  local image="${IMAGE_ARRAY[$I]}"
+  local lane_args="--lane $lane --cpuset=$cpuset --mem-limit=$LANE_MEMORY"
+  export COMPOSE_PROJECT_NAME="$client_base$(lane_suffix $lane)"
+
+  echo "--------------------------------------"
+  echo "[INFO] Run size ${size}M round $run - Client $client - Image $image - Lane $lane"
+  echo "--------------------------------------"
+
+  case $client_base in
+    nethermind) log_entry="initialization completed" ;;
+    reth) log_entry="Starting reth" ;;
+    erigon) log_entry="logging to file system" ;;
+    geth) log_entry="Set global gas cap" ;;
+    besu) log_entry="Writing node record to disk" ;;
+    mock) log_entry="Mock client ready" ;;
+  esac
 
-      case $client in
-        nethermind) log_entry="initialization completed" ;;
-        reth) log_entry="Starting reth" ;;
-        erigon) log_entry="logging to file system" ;;
-        geth) log_entry="Set global gas cap" ;;
-        besu) log_entry="Writing node record to disk" ;;
-      esac
+  cd "scripts/$client_base"
+  lane_compose $lane down --remove-orphans
+  clean_up $lane
+  cd ../..
 
-      cd "scripts/$client"
-      docker compose down --remove-orphans
-      clean_up
-      cd ../..
+  start_time=$(($(date +%s%N) / 1000000))
 
-      start_time=$(($(date +%s%N) / 1000000))
+  if [ -z "$image" ]; then
+    echo "[INFO] Image input is empty, using default image."
+    python3 setup_node.py --client $client $lane_args
+  else
+    echo "[INFO] Using provided image: $image for $client"
+    python3 setup_node.py --client $client --image $image $lane_args
+  fi
 
-      if [ -z "$image" ]; then
-        echo "[INFO] Image input is empty, using default image."
-        python3 setup_node.py --client $client
-      else
-        echo "[INFO] Using provided image: $image for $client"
-        python3 setup_node.py --client $client --image $image
-      fi
+  check_initialization_completed $client "$log_entry" $lane
+  if [ $? -ne 0 ]; then
+    record_result $client $run first $size $lane "$cpuset" $start_time $(($(date +%s%N) / 1000000)) -1 "$log_entry"
+    echo "[ERROR] Initialization check failed for client $client"
+    return
+  fi
 
-      output_file="${OUTPUT_DIR}/${client}_${run}_first_${size}M.txt"
+  initialization_time=$(($(date +%s%N) / 1000000))
+  interval=$((initialization_time - start_time))
+  record_result $client $run first $size $lane "$cpuset" $start_time $initialization_time $interval "$log_entry"
+  echo "[INFO] Interval $interval written to $LEDGER_FILE"
 
-      check_initialization_completed $client "$log_entry"
-      if [ $? -ne 0 ]; then
-        echo "-1" > "$output_file"
-        echo "[ERROR] Initialization check failed for client $client"
-        continue
-      fi
+  cd "scripts/$client_base"
+  lane_compose $lane stop
+  clean_up $lane
+  cd ../..
 
-      initialization_time=$(($(date +%s%N) / 1000000))
-      interval=$((initialization_time - start_time))
-      echo "$interval" > "$output_file"
-      echo "[INFO] Interval $interval written to $output_file"
+  start_time=$(($(date +%s%N) / 1000000))
 
-      cd "scripts/$client"
-      docker compose stop
-      clean_up
-      cd ../..
+  if [ -z "$image" ]; then
+    echo "[INFO] Image input is empty, using default image."
+    python3 setup_node.py --client $client --second-start $lane_args
+  else
+    echo "[INFO] Using provided image: $image for $client"
+    python3 setup_node.py --client $client --image $image --second-start $lane_args
+  fi
 
-      start_time=$(($(date +%s%N) / 1000000))
+  check_initialization_completed $client "$log_entry" $lane
+  if [ $? -ne 0 ]; then
+    record_result $client $run second $size $lane "$cpuset" $start_time $(($(date +%s%N) / 1000000)) -1 "$log_entry"
+    echo "[ERROR] Initialization check failed for client $client"
+    return
+  fi
 
-      if [ -z "$image" ]; then
-        echo "[INFO] Image input is empty, using default image."
-        python3 setup_node.py --client $client --second-start
-      else
-        echo "[INFO] Using provided image: $image for $client"
-        python3 setup_node.py --client $client --image $image --second-start
-      fi
+  initialization_time=$(($(date +%s%N) / 1000000))
+  interval=$((initialization_time - start_time))
+  record_result $client $run second $size $lane "$cpuset" $start_time $initialization_time $interval "$log_entry"
+  echo "[INFO] Interval $interval written to $LEDGER_FILE"
 
-      output_file="${OUTPUT_DIR}/${client}_${run}_second_${size}M.txt"
+  cd "scripts/$client_base"
+  lane_compose $lane down --remove-orphans
+  clean_up $lane
+  cd ../..
+}
 
-      check_initialization_completed $client "$log_entry"
-      if [ $? -ne 0 ]; then
-        echo "-1" > "$output_file"
-        echo "[ERROR] Initialization check failed for client $client"
-        continue
-      fi
+lane_worker() {
+  local lane=$1
+  while true; do
+    job=$(next_job)
+    if [ $job -ge ${#JOBS[@]} ]; then
+      break
+    fi
+    IFS=':' read -r run I <<< "${JOBS[$job]}"
+    run_job $run $I $size $lane
+  done
+}
+
+LEDGER_FILE="${OUTPUT_DIR}/ledger.jsonl"
+JOB_COUNTER="$TEST_PATH/tmp/job_counter"
+
+# Jobs keep the serial order (runs outer, clients inner) so a single lane behaves as before
+JOBS=()
+for run in $(seq 1 $RUNS); do
+  for I in "${!CLIENT_ARRAY[@]}"; do
+    JOBS+=("$run:$I")
+  done
+done
+
+for size in "${SIZES[@]}"; do
+  echo "[INFO] Calculating new size for $size"
+  new_size=$(echo "scale=2; ($size / 1.2 + 0.5)/1" | bc)
+  if [ $? -ne 0 ]; then
+    echo "[ERROR] Error calculating new size with bc"
+    exit 1
+  fi
+  echo "[INFO] New size calculated: $new_size"
+
+  # Each generator writes every encoding from one account set, so only the JSON representation differs
+  encodings=$(IFS=','; echo "${ENCODINGS[*]}")
+  echo "[INFO] Generating ${size}M genesis files with encodings $encodings"
+  python3 generate_chainspec.py $TEST_PATH/chainspec.json $TEST_PATH/tmp/chainspec.json $new_size $encodings
+  python3 generate_genesis.py $TEST_PATH/genesis.json $TEST_PATH/tmp/genesis.json $new_size $encodings
+  python3 generate_besu.py $TEST_PATH/besu.json $TEST_PATH/tmp/besu.json $new_size $encodings
 
-      initialization_time=$(($(date +%s%N) / 1000000))
-      interval=$((initialization_time - start_time))
-      echo "$interval" > "$output_file"
-      echo "[INFO] Interval $interval written to $output_file"
+  for encoding in "${ENCODINGS[@]}"; do
+    use_encoding $encoding
 
-      cd "scripts/$client"
-      docker compose down --remove-orphans
-      clean_up
-      cd ../..
+    echo 0 > "$JOB_COUNTER"
+    for lane in $(seq 0 $((LANES - 1))); do
+      lane_worker $lane &
     done
+    wait
   done
 done
 
 python3 report_speed.py --resultsPath $OUTPUT_DIR
+if [[ " ${CLIENT_ARRAY[*]} " == *" mock "* ]]; then
+  python3 calibration.py --resultsPath $OUTPUT_DIR
+fi
 echo "[INFO] Benchmarking completed and report generated."
\ No newline at end of file
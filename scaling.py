@@ -0,0 +1,96 @@
+import numpy as np
+
+# Two-sided ~95% interval, normal approximation of the prediction error
+Z_95 = 1.96
+MIN_POINTS = 3
+
+
+def _linear_design(x):
+    return np.column_stack((np.ones_like(x), x))
+
+
+def _nlogn_design(x):
+    return np.column_stack((np.ones_like(x), x * np.log(x)))
+
+
+def _power_design(x):
+    return np.column_stack((np.ones_like(x), np.log(x)))
+
+
+# name -> (design matrix builder, fitted in log space)
+MODELS = {
+    'linear': (_linear_design, False),
+    'nlogn': (_nlogn_design, False),
+    'power': (_power_design, True),
+}
+
+MODEL_FORMULAS = {
+    'linear': 'a + b·x',
+    'nlogn': 'a + b·x·ln(x)',
+    'power': 'a·x^b',
+}
+
+
+def fit_model(name, x, y):
+    design, log_space = MODELS[name]
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    if log_space and np.any(y <= 0):
+        return None
+    target = np.log(y) if log_space else y
+    matrix = design(x)
+    params, _, rank, _ = np.linalg.lstsq(matrix, target, rcond=None)
+    if rank < matrix.shape[1]:
+        return None
+    residuals = target - matrix @ params
+    dof = max(len(x) - matrix.shape[1], 1)
+    sigma = float(np.sqrt(np.sum(residuals ** 2) / dof))
+    fit = {
+        'model': name,
+        'formula': MODEL_FORMULAS[name],
+        'params': [float(p) for p in (np.exp(params[0]), params[1])] if log_space else [float(p) for p in params],
+        'n': int(len(x)),
+        '_coefficients': params,
+        '_xtx_inv': np.linalg.pinv(matrix.T @ matrix),
+        '_sigma': sigma,
+    }
+    # Goodness of fit is always measured in the original units so the models are comparable
+    predicted = predict(fit, x)[0]
+    error = y - predicted
+    total = np.sum((y - np.mean(y)) ** 2)
+    fit['rmse'] = float(np.sqrt(np.mean(error ** 2)))
+    fit['r2'] = float(1 - np.sum(error ** 2) / total) if total > 0 else 1.0
+    return fit
+
+
+def predict(fit, x):
+    design, log_space = MODELS[fit['model']]
+    matrix = design(np.atleast_1d(np.asarray(x, dtype=float)))
+    center = matrix @ fit['_coefficients']
+    # Prediction interval of a new observation: parameter uncertainty plus residual noise
+    spread = fit['_sigma'] * np.sqrt(1 + np.einsum('ij,jk,ik->i', matrix, fit['_xtx_inv'], matrix))
+    lower = center - Z_95 * spread
+    upper = center + Z_95 * spread
+    if log_space:
+        return np.exp(center), np.exp(lower), np.exp(upper)
+    return center, lower, upper
+
+
+def fit_scaling(x, y):
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    if len(np.unique(x)) < MIN_POINTS:
+        return None
+    fits = {}
+    for name in MODELS:
+        fit = fit_model(name, x, y)
+        if fit is not None:
+            fits[name] = fit
+    if not fits:
+        return None
+    best = min(fits.values(), key=lambda fit: fit['rmse'])
+    return {'fits': fits, 'best': best['model']}
+
+
+def public_fit(fit):
+    return {key: value for key, value in fit.items() if not key.startswith('_')}
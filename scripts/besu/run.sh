@@ -1,9 +1,11 @@
 # Prepare nethermind image that we will use on the script
 cd scripts/besu
 
-cp ../../tests/tmp/besu.json /tmp/besu.json
-cp jwtsecret /tmp/jwtsecret
+EC_TMP_DIR=${EC_TMP_DIR:-/tmp}
+mkdir -p $EC_TMP_DIR
+cp ../../tests/tmp/besu.json $EC_TMP_DIR/besu.json
+cp jwtsecret $EC_TMP_DIR/jwtsecret
 
-docker compose up -d
+docker compose --env-file ${EC_ENV_FILE:-.env} up -d
 
-docker compose logs
+docker compose --env-file ${EC_ENV_FILE:-.env} logs
@@ -2,9 +2,11 @@
 cd scripts/erigon
 
 
-cp ../../tests/tmp/genesis.json /tmp/genesis.json
-cp jwtsecret /tmp/jwtsecret
+EC_TMP_DIR=${EC_TMP_DIR:-/tmp}
+mkdir -p $EC_TMP_DIR
+cp ../../tests/tmp/genesis.json $EC_TMP_DIR/genesis.json
+cp jwtsecret $EC_TMP_DIR/jwtsecret
 
-docker compose up -d
+docker compose --env-file ${EC_ENV_FILE:-.env} up -d
 
-docker compose logs
\ No newline at end of file
+docker compose --env-file ${EC_ENV_FILE:-.env} logs
\ No newline at end of file
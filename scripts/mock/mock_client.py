@@ -0,0 +1,205 @@
+import argparse
+import json
+import os
+import resource
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CHUNK_SIZE = 1024 * 1024
+MARKER_FILE = "mock-initialized.json"
+
+
+def log(message):
+    timestamp = time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime())
+    print(f"[{timestamp}] {message}", flush=True)
+
+
+def peak_rss_mb():
+    # ru_maxrss is in KB on Linux, the runners compare it with what their samplers saw
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // 1024
+
+
+def read_genesis(genesis_path, parse_rate):
+    # parse_rate is in MB/s, 0 reads the file as fast as the disk allows
+    chunks = []
+    read_bytes = 0
+    start = time.monotonic()
+    with open(genesis_path, 'rb') as file:
+        while True:
+            chunk = file.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            chunks.append(chunk)
+            read_bytes += len(chunk)
+            if parse_rate > 0:
+                expected_elapsed = read_bytes / (parse_rate * 1024 * 1024)
+                delay = expected_elapsed - (time.monotonic() - start)
+                if delay > 0:
+                    time.sleep(delay)
+    genesis = json.loads(b"".join(chunks))
+    return genesis, read_bytes
+
+
+def get_accounts(genesis):
+    # geth/reth/erigon/besu use "alloc", nethermind chainspecs use "accounts"
+    if "alloc" in genesis:
+        return genesis["alloc"]
+    return genesis.get("accounts", {})
+
+
+def get_chain_id(genesis):
+    if "config" in genesis:
+        return int(genesis["config"].get("chainId", 1))
+    network_id = genesis.get("params", {}).get("networkID", "0x1")
+    return int(network_id, 16) if isinstance(network_id, str) else int(network_id)
+
+
+def parse_memory_profile(profile):
+    # "0:128,5:1024,20:256" -> hold 128MB from start, 1024MB after 5s, 256MB after 20s
+    steps = []
+    if not profile:
+        return steps
+    for step in profile.split(","):
+        seconds, megabytes = step.split(":")
+        steps.append((float(seconds), int(megabytes)))
+    return sorted(steps)
+
+
+def follow_memory_profile(steps, start):
+    held = None
+    for seconds, megabytes in steps:
+        delay = seconds - (time.monotonic() - start)
+        if delay > 0:
+            time.sleep(delay)
+        # Release the previous step first, otherwise both buffers are resident while the new one is built
+        held = None
+        # Multiplying a non-zero byte touches every page so the allocation shows up as resident memory
+        held = bytearray(b"\x01") * (megabytes * 1024 * 1024)
+        log(f"Memory profile step: holding {megabytes}MB peak_rss_mb={peak_rss_mb()}")
+    return held
+
+
+def to_quantity(balance):
+    # Genesis balances may be decimal ("1") or hex strings, JSON-RPC quantities are always hex
+    if isinstance(balance, str):
+        balance = int(balance, 16) if balance.lower().startswith("0x") else int(balance)
+    return hex(balance)
+
+
+def make_handler(state):
+    class RpcHandler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length', 0))
+            try:
+                request = json.loads(self.rfile.read(length))
+            except ValueError:
+                self.send_json({"jsonrpc": "2.0", "id": None,
+                                "error": {"code": -32700, "message": "Parse error"}})
+                return
+            if isinstance(request, list):
+                self.send_json([handle_rpc(state, item) for item in request])
+            else:
+                self.send_json(handle_rpc(state, request))
+
+        def send_json(self, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    return RpcHandler
+
+
+def handle_rpc(state, request):
+    method = request.get("method")
+    params = request.get("params") or []
+    response = {"jsonrpc": "2.0", "id": request.get("id")}
+    if method == "web3_clientVersion":
+        response["result"] = "mock/v0.1.0"
+    elif method == "eth_chainId":
+        response["result"] = hex(state["chain_id"])
+    elif method == "net_version":
+        response["result"] = str(state["chain_id"])
+    elif method == "eth_blockNumber":
+        response["result"] = "0x0"
+    elif method == "eth_syncing":
+        response["result"] = False
+    elif method == "eth_getBalance" and params:
+        account = state["accounts"].get(params[0].lower()) or state["accounts"].get(params[0][2:].lower())
+        response["result"] = to_quantity(account.get("balance", "0x0")) if account else "0x0"
+    elif method == "engine_exchangeCapabilities":
+        response["result"] = []
+    else:
+        response["error"] = {"code": -32601, "message": f"Method {method} not found"}
+    return response
+
+
+def serve(port, state):
+    server = ThreadingHTTPServer(("0.0.0.0", port), make_handler(state))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Mock execution client')
+    parser.add_argument('--genesis', type=str, help='Genesis or chainspec file to import.', required=True)
+    parser.add_argument('--datadir', type=str, help='Directory where the import marker is stored.', default='execution-data')
+    parser.add_argument('--parse-rate', type=float, help='Genesis read rate in MB/s, 0 for unthrottled.', default=0)
+    parser.add_argument('--memory-profile', type=str, help='Memory to hold over time as "<seconds>:<MB>,..."', default='')
+    parser.add_argument('--ready-log', type=str, help='Log line emitted once the client is ready.', default='Mock client ready')
+    parser.add_argument('--http-port', type=int, help='JSON-RPC port.', default=8545)
+    parser.add_argument('--engine-port', type=int, help='Engine API port.', default=8551)
+
+    args = parser.parse_args()
+
+    start = time.monotonic()
+    start_ms = int(time.time() * 1000)
+    log(f"Starting mock client, start_ms={start_ms}")
+
+    steps = parse_memory_profile(args.memory_profile)
+    held = []
+    profile_thread = None
+    if steps:
+        profile_thread = threading.Thread(target=lambda: held.append(follow_memory_profile(steps, start)),
+                                          daemon=True)
+        profile_thread.start()
+
+    os.makedirs(args.datadir, exist_ok=True)
+    marker_path = os.path.join(args.datadir, MARKER_FILE)
+    genesis, genesis_bytes = read_genesis(args.genesis, args.parse_rate)
+    if os.path.exists(marker_path):
+        log("Existing database found, skipping genesis import")
+    else:
+        with open(marker_path, 'w') as file:
+            json.dump({'genesis_bytes': genesis_bytes, 'accounts': len(get_accounts(genesis))}, file)
+    parse_ms = int((time.monotonic() - start) * 1000)
+    log(f"Genesis parsed: {genesis_bytes} bytes, {len(get_accounts(genesis))} accounts in {parse_ms}ms")
+
+    state = {
+        "chain_id": get_chain_id(genesis),
+        "accounts": {address.lower(): account for address, account in get_accounts(genesis).items()},
+    }
+    servers = [serve(args.http_port, state), serve(args.engine_port, state)]
+
+    ready_ms = int(time.time() * 1000)
+    log(f"{args.ready_log} ready_ms={ready_ms} startup_ms={ready_ms - start_ms} peak_rss_mb={peak_rss_mb()}")
+
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        for server in servers:
+            server.shutdown()
+        sys.exit(0)
+
+
+if __name__ == '__main__':
+    main()
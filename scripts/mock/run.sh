@@ -0,0 +1,11 @@
+# Prepare mock image that we will use on the script
+cd scripts/mock
+
+EC_TMP_DIR=${EC_TMP_DIR:-/tmp}
+mkdir -p $EC_TMP_DIR
+cp ../../tests/tmp/genesis.json $EC_TMP_DIR/genesis.json
+cp jwtsecret $EC_TMP_DIR/jwtsecret
+
+docker compose --env-file ${EC_ENV_FILE:-.env} up -d
+
+docker compose --env-file ${EC_ENV_FILE:-.env} logs
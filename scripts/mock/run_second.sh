@@ -0,0 +1,5 @@
+cd scripts/mock
+
+docker compose --env-file ${EC_ENV_FILE:-.env} up -d
+
+docker compose --env-file ${EC_ENV_FILE:-.env} logs
@@ -2,9 +2,11 @@
 cd scripts/nethermind
 
 
-cp ../../tests/tmp/chainspec.json /tmp/chainspec.json
-cp jwtsecret /tmp/jwtsecret
+EC_TMP_DIR=${EC_TMP_DIR:-/tmp}
+mkdir -p $EC_TMP_DIR
+cp ../../tests/tmp/chainspec.json $EC_TMP_DIR/chainspec.json
+cp jwtsecret $EC_TMP_DIR/jwtsecret
 
-docker compose up -d
+docker compose --env-file ${EC_ENV_FILE:-.env} up -d
 
-docker compose logs
+docker compose --env-file ${EC_ENV_FILE:-.env} logs
@@ -1,5 +1,5 @@
 cd scripts/nethermind
 
-docker compose up -d
+docker compose --env-file ${EC_ENV_FILE:-.env} up -d
 
-docker compose logs
+docker compose --env-file ${EC_ENV_FILE:-.env} logs
@@ -1,5 +1,5 @@
 cd scripts/reth
 
-docker compose -f docker-compose-second.yaml up -d
+docker compose --env-file ${EC_ENV_FILE:-.env} -f docker-compose-second.yaml up -d
 
-docker compose logs
\ No newline at end of file
+docker compose --env-file ${EC_ENV_FILE:-.env} logs
\ No newline at end of file
@@ -6,30 +6,80 @@ import subprocess
 import yaml
 
 
-def run_command(client, run_path, second_start):
+# Host ports used by lane 0, every other lane shifts them by LANE_PORT_STEP * lane
+BASE_PORTS = {
+    "nethermind": {"p2p": 30304, "metrics": 8009, "http": 8545, "engine": 8551},
+    "default": {"p2p": 30303, "metrics": 8008, "http": 8545, "engine": 8551},
+}
+LANE_PORT_STEP = 100
+
+# Images that are built locally instead of being listed in images.yaml
+LOCAL_IMAGES = {
+    "mock": "genesis-init-mock:local",
+}
+
+
+def lane_suffix(lane):
+    # Lane 0 keeps the historical container names, data dir and ports
+    if lane == 0:
+        return ""
+    return f"-lane{lane}"
+
+
+def get_lane_config(client, lane, cpuset, mem_limit):
+    suffix = lane_suffix(lane)
+    base_ports = BASE_PORTS.get(client, BASE_PORTS["default"])
+    offset = LANE_PORT_STEP * lane
+    return {
+        'suffix': suffix,
+        'project': f"{client}{suffix}",
+        'env_file': f".env{suffix}",
+        'tmp_dir': "/tmp" if lane == 0 else f"/tmp/lane{lane}",
+        'data_dir': f"./execution-data{suffix}",
+        'ports': {name: port + offset for name, port in base_ports.items()},
+        'cpuset': cpuset or "",
+        'mem_limit': mem_limit or "0",
+    }
+
+
+def run_command(client, run_path, second_start, lane_config):
     # Add logic here to run the appropriate command for each client
     if second_start:
         command = f'{run_path}/run_second.sh'
     else:
         command = f'{run_path}/run.sh'
-    print(f"{client} running at url 'http://localhost:8551'(auth), with command: '{command}'")
-    subprocess.run(command, shell=True, text=True)
+    env = dict(os.environ)
+    env['COMPOSE_PROJECT_NAME'] = lane_config['project']
+    env['EC_ENV_FILE'] = lane_config['env_file']
+    env['EC_TMP_DIR'] = lane_config['tmp_dir']
+    engine_port = lane_config['ports']['engine']
+    print(f"{client} running at url 'http://localhost:{engine_port}'(auth), with command: '{command}'")
+    subprocess.run(command, shell=True, text=True, env=env)
 
 
-def set_image(client, el_images, run_path):
+def set_image(client, el_images, run_path, lane_config):
+    tmp_dir = lane_config['tmp_dir']
     if client == "nethermind":
-        specifics = "CHAINSPEC_PATH=/tmp/chainspec.json"
+        specifics = f"CHAINSPEC_PATH={tmp_dir}/chainspec.json\n"
     elif client == "besu":
-        specifics = "CHAINSPEC_PATH=/tmp/besu.json"
-        specifics += "\nEC_ENABLED_MODULES=ETH,NET,CLIQUE,DEBUG,MINER,NET,PERM,ADMIN,EEA,TXPOOL,PRIV,WEB3\n"
+        specifics = f"CHAINSPEC_PATH={tmp_dir}/besu.json\n"
+        specifics += "EC_ENABLED_MODULES=ETH,NET,CLIQUE,DEBUG,MINER,NET,PERM,ADMIN,EEA,TXPOOL,PRIV,WEB3\n"
     else:
-        specifics = "GENESIS_PATH=/tmp/genesis.json"
+        specifics = f"GENESIS_PATH={tmp_dir}/genesis.json\n"
+    ports = lane_config['ports']
     env = f"EC_IMAGE_VERSION={el_images[client]}\n" \
-          "EC_DATA_DIR=./execution-data\n" \
-          "EC_JWT_SECRET_PATH=/tmp/jwtsecret\n" \
-          f"{specifics}"
-
-    env_file_path = os.path.join(run_path, ".env")
+          f"EC_DATA_DIR={lane_config['data_dir']}\n" \
+          f"EC_JWT_SECRET_PATH={tmp_dir}/jwtsecret\n" \
+          f"{specifics}" \
+          f"EC_CONTAINER_SUFFIX={lane_config['suffix']}\n" \
+          f"EC_P2P_PORT={ports['p2p']}\n" \
+          f"EC_METRICS_PORT={ports['metrics']}\n" \
+          f"EC_HTTP_PORT={ports['http']}\n" \
+          f"EC_ENGINE_PORT={ports['engine']}\n" \
+          f"EC_CPUSET={lane_config['cpuset']}\n" \
+          f"EC_MEM_LIMIT={lane_config['mem_limit']}\n"
+
+    env_file_path = os.path.join(run_path, lane_config['env_file'])
     if os.path.exists(env_file_path):
         os.remove(env_file_path)
     with open(env_file_path, "w") as file:
@@ -43,6 +93,9 @@ def main():
     parser.add_argument('--imageBulk', type=str, help='Docker image of the client we are going to use.',
                         default='{"nethermind": "default", "besu": "default", "geth": "default", "reth": "default", "erigon": "default"}')
     parser.add_argument('--second-start', action='store_true', help='Flag to indicate if this is the second start of the script.')
+    parser.add_argument('--lane', type=int, help='Benchmark lane to run the client on.', default=0)
+    parser.add_argument('--cpuset', type=str, help='CPUs the lane containers are pinned to (e.g. 0-7).', default='')
+    parser.add_argument('--mem-limit', type=str, help='Memory limit of the lane containers (e.g. 16g).', default='')
 
     # Parse command-line arguments
     args = parser.parse_args()
@@ -58,8 +111,10 @@ def main():
 
     print(f'image Bulk: {images_bulk}')
 
-    with open('images.yaml', 'r') as f:
-        el_images = yaml.safe_load(f)["images"]
+    el_images = dict(LOCAL_IMAGES)
+    if os.path.exists('images.yaml'):
+        with open('images.yaml', 'r') as f:
+            el_images.update(yaml.safe_load(f)["images"])
 
     if client_without_tag not in el_images:
         print("Client not supported")
@@ -77,10 +132,11 @@ def main():
     run_path = os.path.join(os.getcwd(), "scripts")
     run_path = os.path.join(run_path, client_without_tag)
 
-    set_image(client_without_tag, el_images, run_path)
+    lane_config = get_lane_config(client_without_tag, args.lane, args.cpuset, args.mem_limit)
+    set_image(client_without_tag, el_images, run_path, lane_config)
 
     # Start the client
-    run_command(client, run_path, second_start)
+    run_command(client, run_path, second_start, lane_config)
 
 
 if __name__ == '__main__':